@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import os
+import threading
+
+from flask import Response, request
+
+from singleton import Singleton
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Browsers revalidate assets on every use, which is answered with 304 Not Modified while the file is unchanged
+asset_cache_control = "no-cache"
+
+# Smaller responses are not worth compressing
+compression_min_bytes = 1024
+compressible_mimetypes = ["text/html", "text/css", "text/javascript", "application/javascript", "application/json"]
+
+
+class Asset:
+    def __init__(self, file_name, stat):
+        self.file_name = file_name
+        self.version = (stat.st_mtime_ns, stat.st_size)
+
+        with open(file_name, "rb") as fd:
+            self.data = fd.read()
+
+        self.text = self.data.decode("utf8")
+        self.etag = hashlib.sha256(self.data).hexdigest()[:32]
+
+        # Encoded once when the file is loaded, a strong ETag names exactly one representation
+        self.encodings = {None: (self.data, self.etag)}
+        if len(self.data) >= compression_min_bytes:
+            self.encodings["gzip"] = (gzip.compress(self.data, compresslevel=9, mtime=0), self.etag + "-gzip")
+            if brotli is not None:
+                self.encodings["br"] = (brotli.compress(self.data), self.etag + "-br")
+
+
+class AssetCache(metaclass=Singleton):
+    def __init__(self):
+        self.assets = {}
+        self.lock = threading.Lock()
+
+    def get(self, file_name):
+        # Files are stat'ed on every use so edits are picked up without a restart
+        stat = os.stat(file_name)
+
+        with self.lock:
+            asset = self.assets.get(file_name)
+
+        if asset is None or asset.version != (stat.st_mtime_ns, stat.st_size):
+            asset = Asset(file_name, stat)
+
+            with self.lock:
+                self.assets[file_name] = asset
+
+        return asset
+
+
+def choose_encoding(encodings):
+    for encoding in ["br", "gzip"]:
+        if encoding in encodings and request.accept_encodings[encoding] > 0:
+            return encoding
+
+    return None
+
+
+def send_asset(file_name, mimetype) -> Response:
+    asset = AssetCache().get(file_name)
+
+    encoding = choose_encoding(asset.encodings)
+    data, etag = asset.encodings[encoding]
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(data, mimetype=mimetype)
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = asset_cache_control
+    response.vary.add("Accept-Encoding")
+
+    return response
+
+
+def compress_response(response: Response) -> Response:
+    # Pages built per request, like results with all their shapes, are compressed on the way out
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed or \
+            "Content-Encoding" in response.headers or response.mimetype not in compressible_mimetypes:
+        return response
+
+    data = response.get_data()
+    if len(data) < compression_min_bytes:
+        return response
+
+    encoding = choose_encoding(["br", "gzip"] if brotli is not None else ["gzip"])
+    if encoding is None:
+        return response
+
+    response.set_data(brotli.compress(data, quality=5) if encoding == "br" else gzip.compress(data, compresslevel=6))
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+
+    return response
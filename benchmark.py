@@ -0,0 +1,217 @@
+import argparse
+import json
+import math
+import sys
+import time
+import tracemalloc
+
+from helper import calculate_required_corridor_length
+from results import to_json_number
+from solver.const import PULL_DISTANCE
+from solver.school import School
+
+baseline_file = "benchmark.json"
+
+# Relative slowdown or memory growth over the baseline that is reported as a regression, small absolute differences
+# are ignored as noise
+time_tolerance = 0.25
+time_noise = 0.2
+memory_tolerance = 0.25
+memory_noise = 1024 * 1024
+
+# Widths and lengths are the defaults of the requirements form
+room_sizes = {
+    "classroom": (7, 8), "library": (7, 12), "laboratory": (7, 12), "cafe": (7, 15), "mess": (7, 15), "hall": (7, 20),
+    "gym": (7, 20), "auditorium": (7, 20), "workshop": (7, 12), "WC": (7, 3), "circulation": (7, 15),
+    "administrative": (7, 4), "counseling": (7, 4), "teacherslounge": (7, 11), "headmasters": (7, 5)
+}
+
+# Class count, floor count and network complexity of every program size
+sizes = {
+    "small": (8, 2, 2),
+    "medium": (16, 2, 3),
+    "large": (24, 3, 4),
+}
+
+
+def create_requirements(curriculum, class_count, floor_count):
+    with open("requirements.json", "r") as fd:
+        curriculum_requirements = json.load(fd)[f"{curriculum}"]
+
+    counts = {
+        "classroom": class_count,
+        "library": curriculum_requirements["library"],
+        "laboratory": curriculum_requirements["lab"],
+        "cafe": curriculum_requirements["cafe"],
+        "mess": curriculum_requirements["mess"],
+        "hall": curriculum_requirements["hall"],
+        "gym": curriculum_requirements["gym"],
+        "auditorium": curriculum_requirements["auditorium"],
+        "workshop": curriculum_requirements["workshop"],
+        "WC": floor_count * 2,
+        "circulation": curriculum_requirements["circulation"],
+        "administrative": floor_count,
+        "counseling": curriculum_requirements["counseling"],
+        "teacherslounge": curriculum_requirements["teacherslounge"],
+        "headmasters": curriculum_requirements["headmasters"],
+    }
+
+    return {name: {"width": width, "length": length, "count": counts[name]}
+            for name, (width, length) in room_sizes.items()}
+
+
+# Networks are drawn in units no corridor piece is shorter than, more complex networks have more blocks or crossings
+
+def create_grid_network(complexity):
+    lines = []
+    for i in range(complexity + 1):
+        lines.append([[0, i], [complexity, i]])
+        lines.append([[i, 0], [i, complexity]])
+
+    return lines
+
+
+def create_l_network(complexity):
+    return repeat_block([[[0, 0], [0, 2]], [[0, 2], [2, 2]]], complexity)
+
+
+def create_u_network(complexity):
+    return repeat_block([[[0, 0], [0, 1.5]], [[0, 1.5], [2, 1.5]], [[2, 1.5], [2, 0]]], complexity)
+
+
+def create_courtyard_network(complexity):
+    return repeat_block([[[0, 0], [1.5, 0]], [[1.5, 0], [1.5, 1.5]], [[1.5, 1.5], [0, 1.5]], [[0, 1.5], [0, 0]]],
+                        complexity)
+
+
+def create_diagonal_network(complexity):
+    lines = [[[i, 0], [i + 2, 2]] for i in range(complexity)]
+    lines.append([[0, 2], [complexity + 2, 0]])
+
+    return lines
+
+
+def repeat_block(lines, count):
+    # Separate blocks of the same shape side by side
+    return [[[x + 3 * i, y] for x, y in line] for i in range(count) for line in lines]
+
+
+networks = {
+    "grid": create_grid_network,
+    "l": create_l_network,
+    "u": create_u_network,
+    "courtyard": create_courtyard_network,
+    "diagonal": create_diagonal_network,
+}
+
+
+def scale_network(lines, total_length, unit_length):
+    # Networks are as long as the program needs, but never so small that the longest rooms don't fit a piece
+    length = sum(math.dist(a, b) for a, b in lines)
+    scale = max(total_length / length, unit_length)
+
+    return [[[100 + x * scale, 100 + y * scale] for x, y in line] for line in lines]
+
+
+def create_inputs(network, size, curriculum=1, climate="C", corridor_margin=1.5):
+    class_count, floor_count, complexity = sizes[size]
+    requirements = create_requirements(curriculum, class_count, floor_count)
+
+    total_length = calculate_required_corridor_length(requirements, floor_count) * corridor_margin
+    unit_length = max(r["length"] for r in requirements.values() if r["count"] > 0) + 4 * PULL_DISTANCE
+
+    return {
+        "floor_count": floor_count,
+        "climate": climate,
+        "requirements": requirements,
+        "boundaries": {"corridor": scale_network(networks[network](complexity), total_length, unit_length)},
+    }
+
+
+def run_case(network, size, seed, workers=1):
+    inputs = create_inputs(network, size)
+
+    school = School(inputs)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    best = next(school.iter_solve(1, seed=seed, workers=workers), None)
+
+    duration = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "time": duration,
+        "peak_memory": peak_memory,
+        "solution_count": school.solution_count,
+        "best_score": float(best.get_score()) if best is not None else None,
+        "best_class_score": to_json_number(best.get_class_score()) if best is not None else None,
+        "stages": [stage.to_dict() for stage in school.metrics],
+    }
+
+
+def compare(name, result, baseline):
+    regressions = []
+
+    if result["time"] > baseline["time"] * (1 + time_tolerance) and result["time"] - baseline["time"] > time_noise:
+        regressions.append("time {0:.2f}s -> {1:.2f}s".format(baseline["time"], result["time"]))
+
+    if result["peak_memory"] > baseline["peak_memory"] * (1 + memory_tolerance) and \
+            result["peak_memory"] - baseline["peak_memory"] > memory_noise:
+        regressions.append("peak memory {0:.1f}MB -> {1:.1f}MB".format(
+            baseline["peak_memory"] / 2 ** 20, result["peak_memory"] / 2 ** 20))
+
+    if baseline["best_score"] is not None and (result["best_score"] is None or
+                                               result["best_score"] < baseline["best_score"] - 1e-9):
+        regressions.append("best score {0} -> {1}".format(baseline["best_score"], result["best_score"]))
+
+    return ["{0}: {1}".format(name, r) for r in regressions]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the solver on synthetic corridor networks")
+    parser.add_argument("--network", action="append", choices=list(networks), help="only run these networks")
+    parser.add_argument("--size", action="append", choices=list(sizes), help="only run these program sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="place rooms of large frontiers in this many processes")
+    parser.add_argument("--baseline", default=baseline_file, help="baseline to compare with or save to")
+    parser.add_argument("--save", action="store_true", help="save the results as the new baseline")
+    arguments = parser.parse_args()
+
+    try:
+        with open(arguments.baseline, "r") as fd:
+            baseline = json.load(fd)
+    except FileNotFoundError:
+        baseline = {}
+
+    results = {}
+    regressions = []
+    for network in arguments.network or networks:
+        for size in arguments.size or sizes:
+            name = "{0}/{1}".format(network, size)
+            result = run_case(network, size, arguments.seed, arguments.workers)
+            results[name] = result
+
+            print("{0:<20} {1:>8.2f}s {2:>8.1f}MB {3:>8} solutions  best {4}".format(
+                name, result["time"], result["peak_memory"] / 2 ** 20, result["solution_count"], result["best_score"]))
+
+            if name in baseline and not arguments.save:
+                regressions.extend(compare(name, result, baseline[name]))
+
+    if arguments.save:
+        baseline.update(results)
+        with open(arguments.baseline, "w") as fd:
+            json.dump(baseline, fd, indent=2)
+
+        print("Saved baseline to", arguments.baseline)
+
+    for regression in regressions:
+        print("Regression", regression)
+
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
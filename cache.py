@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import threading
+
+from singleton import Singleton
+
+cache_directory = "cache"
+cache_max_bytes = 256 * 1024 * 1024
+
+# Bump when a solver change makes previously cached results stale
+solve_cache_version = 3
+
+# Bump when a parser change makes previously cached sites stale
+site_cache_version = 1
+
+
+class DiskCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_path(self, key):
+        return os.path.join(self.directory, "{0}.json".format(key))
+
+    def get(self, key):
+        path = self.get_path(key)
+
+        try:
+            with open(path, "r") as fd:
+                value = json.load(fd)
+        except (OSError, ValueError):
+            return None
+
+        # Modification time is the last use of an entry, which is what eviction goes by
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return value
+
+    def put(self, key, value):
+        path = self.get_path(key)
+        temporary_path = "{0}.{1}.tmp".format(path, threading.get_ident())
+
+        with open(temporary_path, "w") as fd:
+            json.dump(value, fd, separators=(",", ":"))
+
+        os.replace(temporary_path, path)
+
+        self.evict()
+
+    def evict(self):
+        with self.lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".json"):
+                    continue
+
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+                total -= size
+
+
+class SolveCache(DiskCache, metaclass=Singleton):
+    def __init__(self):
+        super().__init__(os.path.join(cache_directory, "solve"), cache_max_bytes)
+
+
+class SiteCache(DiskCache, metaclass=Singleton):
+    def __init__(self):
+        super().__init__(os.path.join(cache_directory, "site"), cache_max_bytes)
+
+
+def get_file_key(file_name):
+    digest = hashlib.sha256("{0}:".format(site_cache_version).encode("utf-8"))
+
+    with open(file_name, "rb") as fd:
+        for chunk in iter(lambda: fd.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def get_solve_key(inputs, **parameters):
+    from solver.scoring import get_scoring_table
+
+    # Only what the solver reads is part of the key. Requirements are listed in any order, but corridors keep the order
+    # they were drawn in, and so do their ends, because sides are named and drawn from in that order and a cached seed
+    # only reproduces its layout from the same one
+    corridors = [
+        [[round(float(point[0]), 6), round(float(point[1]), 6)] for point in line]
+        for line in inputs["boundaries"]["corridor"]
+    ]
+
+    requirements = {}
+    for name, data in inputs["requirements"].items():
+        if name == "process" or int(data["count"]) == 0:
+            continue
+
+        requirements[name] = [float(data["width"]), float(data["length"]), int(data["count"])]
+
+    normalized = {
+        "version": solve_cache_version,
+        "corridors": corridors,
+        "requirements": requirements,
+        "climate": inputs["climate"],
+        "floor_count": int(inputs["floor_count"]),
+        "scoring": get_scoring_table().scores.tolist(),
+        "parameters": parameters,
+    }
+
+    data = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
@@ -1,7 +1,7 @@
 import numpy as np
 from solver.enums import ClimateRoomType, Facing
 from solver.enums import Climate
-from solver.solution import get_climate_scoring
+from solver.scoring import get_scoring_table
 
 with open("school.csv", "r") as fd:
     lines = fd.readlines()
@@ -13,7 +13,7 @@ for i, line in enumerate(lines):
 
 for facing in Facing:
     for climate in Climate:
-        scoring = get_climate_scoring(climate)
+        scoring = get_scoring_table().get_climate_scores(climate)
         score = scoring * units
 
         print(facing, climate, score[0].sum() / units[0].sum(), score.sum() / units.sum())
@@ -3,10 +3,11 @@ import os
 from flask import Flask, request
 
 import json
-from helper import load_legend_data, scale_and_center_result, DxfParser, get_climate_score_json
+from assets import compress_response, send_asset
+from helper import load_legend_data, get_climate_score_json, parse_site, solve_ranked
+from jobs import format_seed
 from main import read_html_from_file
 from solver.enums import Climate
-from solver.school import School
 
 app = Flask(__name__)
 
@@ -61,30 +62,20 @@ def save_circulation_run_solver_and_serve_show_results() -> str:
     data["climate"] = climate
 
     dxf_file = request.args.get("dxf")
-    boundaries = DxfParser("dxf/{0}".format(dxf_file)).parse()
+    boundaries, _ = parse_site("dxf/{0}".format(dxf_file))
 
     data["boundaries"] = boundaries
 
-    solutions = School(data).solve()
-    solutions = list(
-        map(
-            lambda e: {"i": e[0], "score": e[1].get_score(), "shapes": e[1].get_shapes(), "class_score": e[1].get_class_score()},
-            enumerate(solutions)
-        )
-    )
-
-    solution_count = len(solutions)
-
-    solutions.sort(key=lambda s: s["score"], reverse=True)
-    solutions = solutions[:50]
+    # A seed reported with an earlier result solves the same inputs to the same result
+    seed = request.args.get("seed", None, type=int)
 
-    scale_and_center_result(solutions, 400, 10)
-    data = json.dumps(solutions)
+    results, solution_count, _, seed = solve_ranked(data, 50, seed=seed)
+    data = json.dumps(results)
 
     legend_data = load_legend_data()
 
-    score = solutions[0]["score"]
-    class_score = solutions[1]["class_score"]
+    score = results["solutions"][0]["score"]
+    class_score = results["solutions"][1]["class_score"]
 
     title = "{0}_{1}_solution_count_{2}_score_{3}_class_score_{4}".format(request.args.get("climate"), dxf_file, solution_count, round(score), class_score)
 
@@ -93,17 +84,23 @@ def save_circulation_run_solver_and_serve_show_results() -> str:
         data=data,
         legend_data=legend_data,
         title=title,
+        seed=format_seed(seed),
         score_data=json.dumps(get_climate_score_json(climate))
     )
 
 
 @app.route("/muscle.js")
 def muscle():
-    return read_html_from_file("muscle.js")
+    return send_asset("muscle.js", "text/javascript")
 
 @app.route("/style.css")
 def style():
-    return read_html_from_file("style.css")
+    return send_asset("style.css", "text/css")
+
+
+@app.after_request
+def compress(response):
+    return compress_response(response)
 
 
 if __name__ == "__main__":
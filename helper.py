@@ -1,3 +1,5 @@
+import heapq
+import math
 import time
 
 import ezdxf
@@ -10,101 +12,90 @@ from singleton import Singleton
 
 upload_directory = "uploads"
 
+# Best solutions of the frontier sent to the browser after every stage while a job is solving
+provisional_result_count = 3
+
+# Processes every solve places rooms of large frontiers in, see FRONTIER_PARALLEL_ROWS. Results don't depend on it
+solve_workers = 1
+
 
 class Ticketor(metaclass=Singleton):
     def __init__(self):
-        self.id = 1
+        from session import get_session_store
 
-    def get_id_and_increment(self):
-        current_id = self.id
-        self.id += 1
+        # Ids come from the session store so processes sharing sessions don't hand out the same id
+        self.store = get_session_store()
 
-        return current_id
+    def get_id_and_increment(self):
+        return self.store.next_id()
 
 
 class Database(metaclass=Singleton):
     def __init__(self):
-        self.storage = {}
+        from session import get_session_store
+
+        self.store = get_session_store()
         self.data = {}
 
     def update_access_time(self, key):
-        now = time.time()
-        self.storage[key]["timestamp"] = now
+        self.store.get(key)
 
     def new_entry(self, key):
-        self.storage[key] = {}
-        self.storage[key]["key"] = key
-
-        self.update_access_time(key)
+        self.store.create(key)
 
     def put_filename(self, key, filename):
         try:
-            self.storage[key]["filename"] = filename.split(".")[0]
+            filename = filename.split(".")[0]
         except Exception:
-            self.storage[key]["filename"] = filename
+            pass
 
-        self.update_access_time(key)
+        self.store.update(key, {"filename": filename})
 
     def put_boundaries(self, key, boundaries):
-        self.storage[key]["boundaries"] = boundaries
-        self.update_access_time(key)
+        self.store.update(key, {"boundaries": boundaries})
 
     def put_area(self, key, area):
-        self.storage[key]["area"] = area
-        self.update_access_time(key)
+        self.store.update(key, {"area": area})
 
     def put_province(self, key, province):
-        self.storage[key]["province"] = province
-        self.update_access_time(key)
+        self.store.update(key, {"province": province})
 
     def put_climate(self, key, climate):
-        self.storage[key]["climate"] = climate
-        self.update_access_time(key)
+        self.store.update(key, {"climate": climate})
 
     def put_curriculum(self, key, curriculum):
-        self.storage[key]["curriculum"] = curriculum
-        self.update_access_time(key)
+        self.store.update(key, {"curriculum": curriculum})
 
     def put_class_count(self, key, class_count):
-        self.storage[key]["class_count"] = class_count
-        self.update_access_time(key)
+        self.store.update(key, {"class_count": class_count})
 
     def put_floor_count(self, key, floor_count):
-        self.storage[key]["floor_count"] = floor_count
-        self.update_access_time(key)
+        self.store.update(key, {"floor_count": floor_count})
 
     def put_requirements(self, key, requirements):
-        self.storage[key]["requirements"] = requirements
-        self.update_access_time(key)
+        self.store.update(key, {"requirements": requirements})
 
     def put_scale(self, key, scale):
-        self.storage[key]["scale"] = scale
-        self.update_access_time(key)
+        self.store.update(key, {"scale": scale})
 
     def get_filename(self, key):
-        self.update_access_time(key)
-
-        return self.storage[key]["filename"]
+        return self.store.get(key)["filename"]
 
     def get_class_count(self, key):
-        self.update_access_time(key)
-
-        return self.storage[key]["class_count"]
+        return self.store.get(key)["class_count"]
 
     def get_boundaries(self, key):
-        self.update_access_time(key)
-
-        boundaries = self.storage[key]["boundaries"]
+        boundaries = self.store.get(key)["boundaries"]
         return boundaries["siteboundary"], boundaries["setbackboundary"], boundaries["corridor"]
 
     def get_climate(self, key):
-        self.update_access_time(key)
-
-        return self.storage[key]["climate"]
+        return self.store.get(key)["climate"]
 
     def clear_corridors(self, key):
-        self.update_access_time(key)
-        self.storage[key]["boundaries"]["corridor"] = []
+        boundaries = dict(self.store.get(key)["boundaries"])
+        boundaries["corridor"] = []
+
+        self.store.update(key, {"boundaries": boundaries})
 
     def get_climate_from_province(self, province_id):
         if "province_climate" not in self.data:
@@ -116,24 +107,21 @@ class Database(metaclass=Singleton):
                 return province["CLIMATE CODE"]
 
     def get_scale(self, key):
-        self.update_access_time(key)
-
-        return self.storage[key]["scale"]
+        return self.store.get(key)["scale"]
 
     def get_floor_count(self, key):
-        self.update_access_time(key)
-
-        return self.storage[key]["floor_count"]
+        return self.store.get(key)["floor_count"]
 
     def get_requirements(self, key):
-        self.update_access_time(key)
-
-        return self.storage[key]["requirements"]
+        return self.store.get(key)["requirements"]
 
     def dump_data(self, key):
-        self.update_access_time(key)
+        return self.store.get(key)
+
 
-        return self.storage[key]
+# Layers and entities boundaries are read from, everything else in a drawing is skipped
+dxf_layers = ["siteboundary", "setbackboundary", "corridor"]
+dxf_entity_types = ["LWPOLYLINE", "LINE"]
 
 
 class DxfParser:
@@ -141,12 +129,55 @@ class DxfParser:
         self.file_name = file_name
 
     def parse(self):
+        with open(self.file_name, "r", encoding="utf-8", errors="replace") as fd:
+            # Binary drawings are rare enough to be left to ezdxf
+            if fd.read(18) == "AutoCAD Binary DXF":
+                return self.parse_document()
+
+            fd.seek(0)
+            points = self.parse_entities(iter_dxf_tags(fd))
+
+        return correct_coordinates(points)
+
+    def parse_entities(self, tags):
+        points = {layer: [] for layer in dxf_layers}
+
+        # Tags are streamed up to the ENTITIES section, whose entities are read until the section ends
+        previous = None
+        for tag in tags:
+            if tag == (2, "ENTITIES") and previous == (0, "SECTION"):
+                break
+            previous = tag
+
+        entity = None
+        for code, value in tags:
+            if code == 0:
+                add_dxf_entity(points, entity)
+
+                if value == "ENDSEC":
+                    break
+
+                entity = {"type": value, "layer": None, "x": [], "y": []} if value in dxf_entity_types else None
+            elif entity is None:
+                continue
+            elif code == 8:
+                entity["layer"] = value
+                if value not in dxf_layers:
+                    entity = None
+            elif code in (10, 11):
+                entity["x"].append(float(value))
+            elif code in (20, 21):
+                entity["y"].append(float(value))
+
+        return points
+
+    def parse_document(self):
         dxf_document = ezdxf.readfile(self.file_name)
-        points = {"siteboundary": [], "setbackboundary": [], "corridor": []}
+        points = {layer: [] for layer in dxf_layers}
 
         for entity in dxf_document.entities:
             layer_name = entity.dxf.layer
-            if layer_name not in ["siteboundary", "setbackboundary", "corridor"]:
+            if layer_name not in dxf_layers:
                 continue
 
             if entity.DXFTYPE == "LWPOLYLINE":
@@ -167,6 +198,47 @@ class DxfParser:
         return points
 
 
+def iter_dxf_tags(fd):
+    # An ASCII drawing is a sequence of group code and value line pairs
+    while True:
+        code = fd.readline()
+        value = fd.readline()
+        if not value:
+            return
+
+        yield int(code), value.strip()
+
+
+def add_dxf_entity(points, entity):
+    if entity is None or entity["layer"] is None:
+        return
+
+    coordinates = list(zip(entity["x"], entity["y"]))
+
+    if entity["type"] == "LWPOLYLINE":
+        points[entity["layer"]] += coordinates
+    elif len(coordinates) == 2:
+        points[entity["layer"]].append((coordinates[0], coordinates[1]))
+
+
+def parse_site(file_name):
+    from cache import SiteCache, get_file_key
+
+    # Boundaries and area only depend on the drawing, so a drawing seen before is not parsed again
+    key = get_file_key(file_name)
+
+    cached = SiteCache().get(key)
+    if cached is not None:
+        return cached["boundaries"], cached["area"]
+
+    boundaries = DxfParser(file_name).parse()
+    area = calculate_area_of_polygon(boundaries["siteboundary"])
+
+    SiteCache().put(key, {"boundaries": boundaries, "area": area})
+
+    return boundaries, area
+
+
 def correct_coordinates(points):
     y_sum = 0
 
@@ -208,10 +280,9 @@ def correct_coordinates(points):
 
 
 def read_html_from_file(filename: str) -> str:
-    with open(filename, "r", encoding="utf8") as fp:
-        content = "".join(fp.readlines())
+    from assets import AssetCache
 
-    return content
+    return AssetCache().get(filename).text
 
 
 def handle_uploaded_file(uploaded_file: FileStorage):
@@ -239,61 +310,68 @@ def get_scale_and_deltas(shape, dimension, border):
     return scale, x_delta, y_delta
 
 
-def scale_and_center_result(solutions, dimension, border):
-    scale_result(solutions, dimension, border)
-    center_result(solutions, dimension)
+def rank_solutions(solutions, count):
+    # Only the best count solutions are kept while the solutions are consumed, results are built for those alone
+    heap = []
+    for i, solution in enumerate(solutions):
+        score = solution.get_score()
+        item = (score if not math.isnan(score) else -math.inf, -i, i, solution)
+
+        if len(heap) < count:
+            heapq.heappush(heap, item)
+        else:
+            heapq.heappushpop(heap, item)
+
+    heap.sort(reverse=True)
+
+    return [(i, solution) for _, _, i, solution in heap]
+
+
+def solve_and_rank(job, inputs):
+    from results import encode_results
+
+    def on_stage(stage, stage_count, room_type, solution_count, best_score, provisional):
+        provisional = encode_results(rank_solutions(provisional, len(provisional)), 400, 10)
 
+        job.update_stage(stage, stage_count, room_type, solution_count, best_score, provisional)
 
-def find_extremes(solution):
-    extremes = {"xmin": 999999999999999999999999999999999, "xmax": 0,
-                "ymin": 999999999999999999999999999999999, "ymax": 0}
+    results, solution_count, metrics, seed = solve_ranked(inputs, 50, on_stage=on_stage,
+                                                          provisional_count=provisional_result_count)
+    job.solution_count = solution_count
+    job.metrics = metrics
+    job.seed = seed
 
-    for shape in solution["shapes"]:
-        for point in shape["points"]:
-            if point[0] > extremes["xmax"]:
-                extremes["xmax"] = point[0]
-            if point[0] < extremes["xmin"]:
-                extremes["xmin"] = point[0]
-            if point[1] > extremes["ymax"]:
-                extremes["ymax"] = point[1]
-            if point[1] < extremes["ymin"]:
-                extremes["ymin"] = point[1]
+    return results
 
-    return extremes
 
+def solve_ranked(inputs, count, on_stage=None, provisional_count=0, seed=None):
+    from cache import SolveCache, get_solve_key
+    from metrics import Metrics
+    from results import encode_results
+    from solver.school import School
 
-def scale_result(solutions, dimension, border):
-    for solution in solutions:
-        extremes = find_extremes(solution)
+    # Without a seed any earlier solve of the inputs will do, it is returned with the seed that reproduces it
+    key = get_solve_key(inputs, count=count, dimension=400, border=10, seed=seed)
 
-        scale = (dimension - 2 * border) / max(extremes["xmax"] - extremes["xmin"],
-                                               extremes["ymax"] - extremes["ymin"])
+    cached = SolveCache().get(key)
+    if cached is not None:
+        Metrics().increment("solve_cache_hits")
+        return cached["results"], cached["solution_count"], cached.get("metrics", []), cached.get("seed")
 
-        for shape in solution["shapes"]:
-            scaled_points = []
-            for point in shape["points"]:
-                scaled_points.append((
-                    point[0] * scale,
-                    point[1] * scale
-                ))
-            shape["points"] = scaled_points
+    start = time.perf_counter()
 
+    school = School(inputs)
+    solutions = school.iter_solve(count, workers=solve_workers, seed=seed, on_stage=on_stage,
+                                  provisional_count=provisional_count)
+    results = encode_results(rank_solutions(solutions, count), 400, 10)
 
-def center_result(solutions, dimension):
-    for solution in solutions:
-        extremes = find_extremes(solution)
+    metrics = [stage.to_dict() for stage in school.metrics]
+    Metrics().record_solve(time.perf_counter() - start, metrics)
 
-        xdelta = dimension / 2 - (extremes["xmax"] + extremes["xmin"]) / 2
-        ydelta = dimension / 2 - (extremes["ymax"] + extremes["ymin"]) / 2
+    SolveCache().put(key, {"results": results, "solution_count": school.solution_count, "metrics": metrics,
+                           "seed": school.seed})
 
-        for shape in solution["shapes"]:
-            offseted_points = []
-            for point in shape["points"]:
-                offseted_points.append((
-                    point[0] + xdelta,
-                    point[1] + ydelta
-                ))
-            shape["points"] = offseted_points
+    return results, school.solution_count, metrics, school.seed
 
 
 def unscale_shape(shape, scale, dimension):
@@ -363,12 +441,12 @@ def room_name_display(room_name):
 
 def get_climate_score_json(climate):
     from solver.school import get_climate_from_string
-    from solver.solution import inner_climate_scores
+    from solver.scoring import get_scoring_table
 
     names = ["Classroom", "Library", "Laboratory", "Cafeteria", "Dining Hall", "Multi-Purpose Hall", "Gymnasium", "Auditorium", "Workshop", "WC", "Circulation", "Administrative"]
 
     climate = get_climate_from_string(climate)
-    scores = inner_climate_scores()[climate]
+    scores = get_scoring_table().get_climate_scores(climate).tolist()
 
     score_data = []
     for name, scores in zip(names, scores):
@@ -0,0 +1,205 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import Metrics, duration_buckets
+from singleton import Singleton
+from solver.exception import CancelledException
+
+max_running_jobs = 2
+finished_job_lifetime = 60 * 60
+
+# Seconds an event stream waits for an event before it sends a comment to keep the connection open
+event_heartbeat_interval = 15
+
+
+class Job:
+    def __init__(self, job_id, process_id):
+        self.id = job_id
+        self.process_id = process_id
+
+        self.status = "queued"
+        self.stage = None
+        self.progress = 0.0
+        self.solution_count = 0
+        self.best_score = None
+        self.metrics = []
+        self.seed = None
+
+        self.result = None
+        self.error = None
+
+        self.cancel_requested = False
+        self.future = None
+
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+        # Events are (id, name, data), streamed to the browser by iter_job_events
+        self.events = []
+        self.event_id = 0
+        self.condition = threading.Condition()
+
+        self.publish("status", self.to_dict())
+
+    def update_stage(self, stage, stage_count, room_type, solution_count, best_score, provisional):
+        # Solvers call this between their stages, which is where a cancelled job stops
+        if self.cancel_requested:
+            raise CancelledException
+
+        self.stage = room_type.name if room_type is not None else None
+        self.progress = stage / stage_count
+        self.solution_count = solution_count
+        self.best_score = best_score
+
+        self.publish("stage", {
+            "stage": self.stage,
+            "progress": self.progress,
+            "solution_count": self.solution_count,
+            "best_score": self.best_score,
+            "elapsed": time.time() - self.started,
+        })
+
+        if len(provisional["solutions"]) > 0:
+            self.publish("provisional", provisional)
+
+    def set_status(self, status):
+        self.status = status
+        self.publish("status", self.to_dict())
+
+    def publish(self, name, data):
+        with self.condition:
+            # Only the latest provisional results are worth sending to a browser that connects late
+            if name == "provisional":
+                self.events = [e for e in self.events if e[1] != name]
+
+            self.event_id += 1
+            self.events.append((self.event_id, name, data))
+            self.condition.notify_all()
+
+    def wait_events(self, last_event_id, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.events[-1][0] > last_event_id or self.is_finished(), timeout)
+
+            return [e for e in self.events if e[0] > last_event_id]
+
+    def is_finished(self):
+        return self.status in ["done", "failed", "cancelled"]
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "process_id": self.process_id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "solution_count": self.solution_count,
+            "best_score": self.best_score,
+            "metrics": self.metrics,
+            "seed": format_seed(self.seed),
+            "error": self.error,
+        }
+
+
+class JobManager(metaclass=Singleton):
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_running_jobs)
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, process_id, function, *args):
+        from session import get_session_store
+
+        # Ids come from the session store, so with a shared one a job id asked of another process is unknown to it
+        # rather than the id of one of its own jobs
+        job_id = get_session_store().next_id("job")
+
+        with self.lock:
+            self.remove_finished_jobs()
+
+            job = Job(job_id, process_id)
+
+            # A job is only visible to cancel with its future, which the worker may already be running
+            job.future = self.executor.submit(self.run, job, function, *args)
+            self.jobs[job.id] = job
+
+        return job
+
+    def run(self, job, function, *args):
+        if job.cancel_requested:
+            self.finish(job, "cancelled")
+            return
+
+        job.started = time.time()
+        job.set_status("running")
+
+        try:
+            job.result = function(job, *args)
+        except CancelledException:
+            self.finish(job, "cancelled")
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            self.finish(job, "failed")
+        else:
+            job.progress = 1.0
+            self.finish(job, "done")
+
+    def finish(self, job, status):
+        job.finished = time.time()
+        job.set_status(status)
+
+        Metrics().increment("jobs_{0}".format(status))
+        Metrics().observe("job_duration_seconds", job.finished - job.created, duration_buckets, status)
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.is_finished():
+            return job
+
+        job.cancel_requested = True
+        if job.future is not None and job.future.cancel():
+            self.finish(job, "cancelled")
+
+        return job
+
+    def count_by_status(self):
+        with self.lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+
+            return counts
+
+    def remove_finished_jobs(self):
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.is_finished() and now - job.finished > finished_job_lifetime:
+                del self.jobs[job_id]
+
+
+def format_seed(seed):
+    # Seeds are 128 bit integers, which lose digits as JSON numbers in a browser
+    return str(seed) if seed is not None else None
+
+
+def iter_job_events(job, last_event_id=0):
+    # Server-sent events of a job from the one after last_event_id until the job finishes
+    while True:
+        events = job.wait_events(last_event_id, event_heartbeat_interval)
+
+        if len(events) == 0:
+            if job.is_finished():
+                return
+
+            yield ": heartbeat\n\n"
+            continue
+
+        for event_id, name, data in events:
+            yield "id: {0}\nevent: {1}\ndata: {2}\n\n".format(event_id, name, json.dumps(data))
+            last_event_id = event_id
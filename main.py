@@ -1,6 +1,10 @@
-from flask import Flask, request, Response
+import copy
+
+from flask import Flask, request, Response, abort, jsonify
 
 from helper import *
+from assets import compress_response, send_asset
+from jobs import JobManager, format_seed, iter_job_events
 
 app = Flask(__name__)
 app.config["UPLOAD_FOLDER"] = upload_directory
@@ -31,10 +35,8 @@ def save_plan_and_serve_curriculum_selection() -> str:
 
     Database().put_filename(process_id, file_name)
 
-    boundaries = DxfParser(file_name).parse()
+    boundaries, area = parse_site(file_name)
     Database().put_boundaries(process_id, boundaries)
-
-    area = calculate_area_of_polygon(boundaries["siteboundary"])
     Database().put_area(process_id, area)
 
     return read_html_from_file("select_curriculum_and_climate.html").format(process_id=process_id, area=area)
@@ -141,9 +143,7 @@ def save_requirements_list_and_serve_circulation_drawer() -> str:
 
 
 @app.route("/show_result", methods=["post"])
-def save_circulation_run_solver_and_serve_show_results() -> str:
-    from solver.school import School
-    from helper import load_legend_data
+def save_circulation_and_serve_solve_progress() -> str:
     from datetime import datetime
 
     process_id = request.form.get("process_id", 0, type=int)
@@ -169,40 +169,117 @@ def save_circulation_run_solver_and_serve_show_results() -> str:
     with open("json/{0}.json".format(timestamp), "w") as fd:
         json.dump(Database().dump_data(process_id), fd)
 
-    solutions = School(Database().dump_data(process_id)).solve()
-    solutions = enumerate(solutions)
-    solutions = list(map(lambda e: {"i": e[0], "score": e[1].get_score(), "shapes": e[1].get_shapes(), "class_score": e[1].get_class_score()}, solutions))
+    job = submit_solve_job(process_id)
+
+    return read_html_from_file("wait_result.html").format(
+        process_id=process_id,
+        job_id=job.id,
+        legend_data=load_legend_data()
+    )
+
+
+@app.route("/jobs", methods=["post"])
+def submit_job() -> Response:
+    process_id = request.form.get("process_id", 0, type=int)
+
+    return jsonify(submit_solve_job(process_id).to_dict())
+
+
+@app.route("/jobs/<int:job_id>")
+def serve_job_status(job_id) -> Response:
+    job = JobManager().get(job_id)
+    if job is None:
+        abort(404)
+
+    return jsonify(job.to_dict())
+
+
+@app.route("/jobs/<int:job_id>/events")
+def stream_job_events(job_id) -> Response:
+    job = JobManager().get(job_id)
+    if job is None:
+        abort(404)
+
+    # Browsers reconnecting after a dropped connection send the id of the last event they got
+    last_event_id = request.headers.get("Last-Event-ID", 0, type=int)
+
+    return Response(
+        iter_job_events(job, last_event_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-    solutions.sort(key=lambda s: s["score"], reverse=True)
-    solutions = solutions[:50]
 
-    scale_and_center_result(solutions, 400, 10)
-    data = json.dumps(solutions)
+@app.route("/jobs/<int:job_id>/cancel", methods=["post"])
+def cancel_job(job_id) -> Response:
+    job = JobManager().cancel(job_id)
+    if job is None:
+        abort(404)
 
-    legend_data = load_legend_data()
+    return jsonify(job.to_dict())
+
+
+@app.route("/jobs/<int:job_id>/result")
+def serve_job_result(job_id) -> str:
+    from helper import load_legend_data
+
+    job = JobManager().get(job_id)
+    if job is None:
+        abort(404)
+
+    if job.status != "done":
+        abort(409)
+
+    # The session of a job can expire or be evicted while the job is kept
+    try:
+        climate = Database().get_climate(job.process_id)
+    except KeyError:
+        abort(410)
 
     return read_html_from_file("show_result.html").format(
-        process_id=process_id,
-        data=data,
-        legend_data=legend_data,
+        process_id=job.process_id,
+        data=json.dumps(job.result),
+        legend_data=load_legend_data(),
         title="ArchSolvED",
-        score_data=json.dumps(get_climate_score_json(Database().get_climate(process_id)))
+        seed=format_seed(job.seed),
+        score_data=json.dumps(get_climate_score_json(climate))
     )
 
 
+@app.route("/metrics")
+def serve_metrics() -> Response:
+    from metrics import Metrics
+
+    metrics = Metrics().to_dict()
+    metrics["jobs"] = JobManager().count_by_status()
+
+    return jsonify(metrics)
+
+
+def submit_solve_job(process_id):
+    inputs = copy.deepcopy(Database().dump_data(process_id))
+
+    return JobManager().submit(process_id, solve_and_rank, inputs)
+
+
 @app.route("/corridor_drawer.js")
 def serve_corridor_drawer_js() -> Response:
-    return Response(read_html_from_file("corridor_drawer.js"), mimetype="text/javascript")
+    return send_asset("corridor_drawer.js", "text/javascript")
 
 
 @app.route("/muscle.js")
 def serve_muscle_js() -> Response:
-    return Response(read_html_from_file("muscle.js"), mimetype="text/javascript")
+    return send_asset("muscle.js", "text/javascript")
 
 
 @app.route("/style.css")
 def serve_style_css() -> Response:
-    return Response(read_html_from_file("style.css"), mimetype="text/css")
+    return send_asset("style.css", "text/css")
+
+
+@app.after_request
+def compress(response: Response) -> Response:
+    return compress_response(response)
 
 
 if __name__ == "__main__":
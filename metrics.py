@@ -0,0 +1,78 @@
+import bisect
+import threading
+
+from singleton import Singleton
+
+# Upper bounds of histogram buckets, values past the last one fall in an overflow bucket
+duration_buckets = [0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300]
+frontier_size_buckets = [10, 100, 1000, 10000, 50000, 100000, 500000, 1000000]
+byte_buckets = [2 ** 20, 2 ** 24, 2 ** 26, 2 ** 28, 2 ** 29, 2 ** 30, 2 ** 32]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self):
+        return {
+            "buckets": self.buckets,
+            "counts": list(self.counts),
+            "count": self.count,
+            "sum": self.sum,
+        }
+
+
+class Metrics(metaclass=Singleton):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def increment(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value, buckets, label=None):
+        # Histograms of a name are kept per label, like the room type of a stage
+        with self.lock:
+            histograms = self.histograms.setdefault(name, {})
+            if label not in histograms:
+                histograms[label] = Histogram(buckets)
+
+            histograms[label].observe(value)
+
+    def record_solve(self, duration, stages):
+        self.increment("solves")
+        self.observe("solve_duration_seconds", duration, duration_buckets)
+
+        for stage in stages:
+            room_type = stage["room_type"] if stage["room_type"] is not None else "exact"
+
+            self.increment("clones", stage["clones"])
+            self.increment("pruned", stage["pruned"])
+            self.increment("unplaced", stage["unplaced"])
+            self.increment("missing_rooms", stage["missing_rooms"])
+            if stage["spilled"]:
+                self.increment("spilled_stages")
+
+            self.observe("stage_duration_seconds", stage["duration"], duration_buckets, room_type)
+            self.observe("frontier_size", stage["frontier_after"], frontier_size_buckets, room_type)
+            self.observe("frontier_bytes", stage["nbytes"], byte_buckets, room_type)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: {label if label is not None else "all": h.to_dict() for label, h in histograms.items()}
+                    for name, histograms in self.histograms.items()
+                },
+            }
@@ -77,8 +77,75 @@ function draw_legend_entry(legend, legend_entry) {
     legend.appendChild(legend_cell);
 }
 
+function load_results() {
+    return decode_results(JSON.parse(document.getElementById("data").innerText));
+}
+
+function decode_results(data) {
+    // Rebuilds the shapes of every solution from the shared sides and corridors, see encode_results in results.py
+    let quantum = data.quantum;
+
+    let sides = [];
+    for (let k = 0; k < data.sides.length; k += 5) {
+        let ux = Math.cos(data.sides[k + 2]);
+        let uy = Math.sin(data.sides[k + 2]);
+        let sign = data.sides[k + 3] ? -1 : 1;
+
+        sides.push({
+            x: data.sides[k] * quantum, y: data.sides[k + 1] * quantum,
+            ux: ux, uy: uy, vx: sign * uy, vy: -sign * ux,
+            floor: data.sides[k + 4]
+        });
+    }
+
+    let solutions = [];
+    for (let solution of data.solutions) {
+        let [scale, x_delta, y_delta] = solution.transform;
+        let transform = (x, y) => [x * scale + x_delta, y * scale + y_delta];
+
+        let shapes = [];
+        for (let k = 0; k < solution.rooms.length; k += 4) {
+            let side = sides[solution.rooms[k]];
+            let offset = solution.rooms[k + 1] * quantum;
+            let [length, width, color] = data.specs[solution.rooms[k + 2]];
+
+            let x = side.x + offset * side.ux;
+            let y = side.y + offset * side.uy;
+
+            shapes.push({
+                layer: side.floor,
+                points: [
+                    transform(x, y),
+                    transform(x + width * side.vx, y + width * side.vy),
+                    transform(x + width * side.vx + length * side.ux, y + width * side.vy + length * side.uy),
+                    transform(x + length * side.ux, y + length * side.uy)
+                ],
+                color: color,
+                score: solution.rooms[k + 3]
+            });
+        }
+
+        for (let layer = 0; layer < data.floor_count; layer++) {
+            for (let k = 0; k < data.corridors.length; k += 4) {
+                let c = data.corridors.slice(k, k + 4).map(v => v * quantum);
+
+                shapes.push({
+                    layer: layer,
+                    points: [transform(c[0], c[1]), transform(c[2], c[3])],
+                    color: data.corridor_color,
+                    score: 0
+                });
+            }
+        }
+
+        solutions.push({i: solution.i, score: solution.score, class_score: solution.class_score, shapes: shapes});
+    }
+
+    return solutions;
+}
+
 function draw_canvas_from_data() {
-    let data = JSON.parse(document.getElementById("data").innerText);
+    let data = load_results();
 
     if (data.length === 0) {
         let results = document.getElementById("results");
@@ -106,8 +173,8 @@ function do_insert_result(data, text_row, image_row) {
                 "<h3 style='padding: 0.1em'>Solution: " + (data.i + 1).toString() + "</h3>" +
             "</td>" +
             "<td>" +
-                "<h3 style='padding: 0.1em'>Score: " + data.score.toFixed(2) + "</h3>" +
-                "<h3 style='padding: 0.1em'>Class score: " + data.class_score.toFixed(2) + "</h3>" +
+                "<h3 style='padding: 0.1em'>Score: " + (data.score === null ? "-" : data.score.toFixed(2)) + "</h3>" +
+                "<h3 style='padding: 0.1em'>Class score: " + (data.class_score === null ? "-" : data.class_score.toFixed(2)) + "</h3>" +
             "</td>" +
             "<td>" +
                 "<button onclick='print_solution(" + data.i + ")'>Print</button>" +
@@ -188,6 +255,86 @@ function do_insert_result(data, text_row, image_row) {
     }
 }
 
+function on_wait_page_load() {
+    if (!window.EventSource) {
+        poll_job();
+        return;
+    }
+
+    let job_id = document.getElementById("job_id").value;
+    let events = new EventSource("/jobs/" + job_id + "/events");
+
+    events.addEventListener("status", event => {
+        let job = JSON.parse(event.data);
+        show_job_status(job);
+
+        if (job.status === "done") {
+            events.close();
+            window.location.href = "/jobs/" + job_id + "/result";
+        } else if (!(job.status === "queued" || job.status === "running")) {
+            events.close();
+        }
+    });
+
+    events.addEventListener("stage", event => show_job_stage(JSON.parse(event.data)));
+    events.addEventListener("provisional", event => show_provisional_results(JSON.parse(event.data)));
+}
+
+function poll_job() {
+    let job_id = document.getElementById("job_id").value;
+
+    fetch("/jobs/" + job_id)
+        .then(response => response.json())
+        .then(job => {
+            show_job_status(job);
+
+            if (job.status === "done") {
+                window.location.href = "/jobs/" + job_id + "/result";
+            } else if (job.status === "queued" || job.status === "running") {
+                setTimeout(poll_job, 1000);
+            }
+        });
+}
+
+function cancel_job() {
+    let job_id = document.getElementById("job_id").value;
+
+    fetch("/jobs/" + job_id + "/cancel", {method: "POST"})
+        .then(response => response.json())
+        .then(job => show_job_status(job));
+}
+
+function show_job_status(job) {
+    document.getElementById("job_status").innerText = job.status;
+    document.getElementById("job_stage").innerText = job.stage === null ? "" : "(" + job.stage + ", " + job.solution_count + " solutions)";
+    document.getElementById("job_progress").value = job.progress;
+
+    if (job.status === "failed") {
+        document.getElementById("job_status").innerText = "failed: " + job.error;
+    }
+
+    document.getElementById("cancel").disabled = !(job.status === "queued" || job.status === "running");
+}
+
+function show_job_stage(stage) {
+    let best_score = stage.best_score === null ? "-" : stage.best_score.toFixed(2);
+
+    document.getElementById("job_stage").innerText = "(" + stage.stage + ", " + stage.solution_count + " solutions, best score " + best_score + ", " + stage.elapsed.toFixed(1) + " s)";
+    document.getElementById("job_progress").value = stage.progress;
+}
+
+function show_provisional_results(data) {
+    // Printing reads the solutions from the data element like on the results page
+    document.getElementById("data").innerText = JSON.stringify(data);
+
+    let results = document.getElementById("results");
+    results.innerHTML = "";
+
+    for (let d of decode_results(data)) {
+        insert_element_and_draw(d);
+    }
+}
+
 function update_areas() {
     let rooms = ["classroom", "library", "laboratory", "cafe", "mess", "hall", "gym", "auditorium", "workshop", "WC", "circulation", "administrative", "counseling", "teacherslounge", "headmasters"];
 
@@ -219,7 +366,7 @@ function print_solution(i) {
     frame.contentDocument.write("<h1>ArchSolved</h1>" + "<h2>Result</h2>" + "<table id='result' class='result'></table>" + "<h2>Legend</h2>" + "<div id='legend' class='legend'></div>");
 
     let body = frame.contentDocument.body;
-    let data = JSON.parse(document.getElementById("data").innerText)[i];
+    let data = load_results()[i];
     let result = body.getElementsByClassName("result")[0];
     let text_row = result.insertRow(-1);
     let image_row = result.insertRow(-1);
@@ -0,0 +1,132 @@
+import math
+
+import numpy as np
+
+# Coordinates are sent as integers counting this many meters, angles are rounded to this many digits
+result_quantum = 0.01
+result_angle_digits = 6
+
+
+def encode_results(ranked, dimension, border):
+    # Geometry every solution shares is sent once, a room is a slot on a side and the browser builds its corners,
+    # see decode_results in muscle.js
+    from solver.enums import RoomType
+    from solver.shape import get_footprints, get_side_frames, get_side_geometry
+    from solver.solution import load_room_color_map_from_file
+
+    color_map = load_room_color_map_from_file()
+
+    results = {
+        "quantum": result_quantum,
+        "floor_count": 0,
+        "corridor_color": color_map[RoomType.CIRCULATION],
+        "corridors": [],
+        "sides": [],
+        "specs": [],
+        "solutions": [],
+    }
+
+    if len(ranked) == 0:
+        return results
+
+    base = ranked[0][1]
+    results["floor_count"] = max(side.floor for side in base.sides) + 1 if len(base.sides) > 0 else 0
+
+    corridors = quantise(np.array(
+        [[c.line.a.x, c.line.a.y, c.line.b.x, c.line.b.y] for c in base.draw_corridors], dtype=np.float64
+    ).reshape((-1, 4)))
+    results["corridors"] = corridors.ravel().tolist()
+
+    # The browser only knows the quantised frames, so corners and extents are built from them too
+    origins, angles, mirrored = get_side_geometry(base.sides)
+    origins = quantise(origins)
+    angles = np.round(angles, result_angle_digits)
+
+    for (x, y), angle, a, side in zip(origins.tolist(), angles.tolist(), mirrored.tolist(), base.sides):
+        results["sides"].extend([x, y, angle, int(a), side.floor])
+
+    frames = get_side_frames(origins * result_quantum, angles, mirrored)
+
+    # Rooms are listed floor by floor, which is the order the browser draws them in
+    order = sorted(range(len(base.sides)), key=lambda i: base.sides[i].floor)
+
+    specs = {}
+    slots = []
+    room_counts = []
+    for _, solution in ranked:
+        room_count = 0
+        for index in order:
+            side = solution.sides[index]
+
+            offset = 0
+            for room in side.rooms:
+                spec = (room.length, room.width, color_map[room.type])
+                if spec not in specs:
+                    specs[spec] = len(specs)
+                    results["specs"].append(list(spec))
+
+                slots.append((index, offset, specs[spec], float(solution.room_scores[room.type, side.facing])))
+                offset += room.length
+                room_count += 1
+
+        room_counts.append(room_count)
+
+    # Corners of the rooms of every solution are built at once, and each room's solution gives the extents
+    slots = np.array(slots, dtype=np.float64).reshape((-1, 4))
+    sides = slots[:, 0].astype(np.intp)
+    offsets = quantise(slots[:, 1])
+    spec_indices = slots[:, 2].astype(np.intp)
+    sizes = np.array([spec[:2] for spec in results["specs"]], dtype=np.float64).reshape((-1, 2))
+
+    footprints = get_footprints(frames, sides, offsets * result_quantum, sizes[spec_indices, 0],
+                                sizes[spec_indices, 1])
+    owners = np.repeat(np.arange(len(ranked)), room_counts)
+
+    transforms = get_transforms(footprints, owners, len(ranked), corridors.reshape((-1, 2)) * result_quantum,
+                                dimension, border)
+
+    # Slots stay a flat list per solution, which is the shortest JSON for them
+    rows = np.cumsum([0] + room_counts).tolist()
+    columns = list(zip(sides.tolist(), offsets.tolist(), spec_indices.tolist(), slots[:, 3].tolist()))
+    for k, (i, solution) in enumerate(ranked):
+        results["solutions"].append({
+            "i": i,
+            "score": to_json_number(solution.get_score()),
+            "class_score": to_json_number(solution.get_class_score()),
+            "transform": transforms[k].tolist(),
+            "rooms": [v for slot in columns[rows[k]:rows[k + 1]] for v in slot],
+        })
+
+    return results
+
+
+def quantise(v):
+    return np.rint(np.asarray(v, dtype=np.float64) / result_quantum).astype(np.int64)
+
+
+def to_json_number(v):
+    # NaN is not valid JSON
+    return None if v is None or math.isnan(v) else float(v)
+
+
+def get_transforms(footprints, owners, count, shared_points, dimension, border):
+    # Scale fitting every solution into a dimension sized square with a border, then the offset centering it
+    lower = np.full((count, 2), np.inf)
+    upper = np.full((count, 2), -np.inf)
+
+    if len(shared_points) > 0:
+        lower[:] = shared_points.min(axis=0)
+        upper[:] = shared_points.max(axis=0)
+
+    if len(footprints) > 0:
+        np.minimum.at(lower, owners, footprints.min(axis=1))
+        np.maximum.at(upper, owners, footprints.max(axis=1))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = (dimension - 2 * border) / (upper - lower).max(axis=1)
+        scale[~np.isfinite(scale)] = 1.0
+
+        delta = dimension / 2 - (upper + lower) * scale[:, np.newaxis] / 2
+        delta[~np.isfinite(delta)] = 0.0
+
+    return np.column_stack([scale, delta])
@@ -0,0 +1,191 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# "memory" keeps sessions in this process, "sqlite" keeps them in session_database_file so several worker processes
+# serve the same wizard steps. Solve jobs stay in the process that started them, see jobs.py. The environment variables
+# ARCHSOLVED_SESSION_BACKEND and ARCHSOLVED_SESSION_DATABASE_FILE override these
+session_backend = "memory"
+session_database_file = "sessions.sqlite3"
+
+# Sessions unused for session_lifetime seconds are dropped, and the least recently used ones past session_max_entries
+session_lifetime = 24 * 60 * 60
+session_max_entries = 1000
+
+
+class MemorySessionStore:
+    def __init__(self, max_entries, lifetime):
+        self.max_entries = max_entries
+        self.lifetime = lifetime
+
+        # Entries are kept in order of use, least recently used first
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {}
+
+    def next_id(self, name="id"):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+            return self.counters[name]
+
+    def create(self, key):
+        with self.lock:
+            self.entries[key] = {"key": key, "timestamp": time.time()}
+            self.entries.move_to_end(key)
+
+            self.evict()
+
+    def get(self, key):
+        # A copy, so a reader is not affected by updates made while it uses the entry
+        with self.lock:
+            return dict(self.touch(key))
+
+    def update(self, key, fields):
+        with self.lock:
+            self.touch(key).update(fields)
+
+    def touch(self, key):
+        entry = self.entries[key]
+
+        now = time.time()
+        if now - entry["timestamp"] > self.lifetime:
+            del self.entries[key]
+            raise KeyError(key)
+
+        entry["timestamp"] = now
+        self.entries.move_to_end(key)
+
+        return entry
+
+    def evict(self):
+        now = time.time()
+        while len(self.entries) > 0:
+            key, entry = next(iter(self.entries.items()))
+            if len(self.entries) <= self.max_entries and now - entry["timestamp"] <= self.lifetime:
+                break
+
+            del self.entries[key]
+
+
+class SqliteSessionStore:
+    def __init__(self, file_name, max_entries, lifetime):
+        self.file_name = file_name
+        self.max_entries = max_entries
+        self.lifetime = lifetime
+
+        # Connections can't be shared between threads, every thread opens its own
+        self.local = threading.local()
+
+        with self.transaction() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS sessions "
+                               "(key INTEGER PRIMARY KEY, data TEXT, timestamp REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS sessions_timestamp ON sessions (timestamp)")
+            connection.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+            connection.execute("INSERT OR IGNORE INTO counters VALUES ('id', 0)")
+
+    def get_connection(self):
+        if not hasattr(self.local, "connection"):
+            connection = sqlite3.connect(self.file_name, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+
+        return self.local.connection
+
+    def transaction(self):
+        return SqliteTransaction(self.get_connection())
+
+    def next_id(self, name="id"):
+        with self.transaction() as connection:
+            connection.execute("INSERT OR IGNORE INTO counters VALUES (?, 0)", (name,))
+            connection.execute("UPDATE counters SET value = value + 1 WHERE name = ?", (name,))
+            return connection.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()[0]
+
+    def create(self, key):
+        now = time.time()
+
+        with self.transaction() as connection:
+            connection.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                               (key, json.dumps({"key": key, "timestamp": now}), now))
+
+            connection.execute("DELETE FROM sessions WHERE timestamp < ?", (now - self.lifetime,))
+            connection.execute("DELETE FROM sessions WHERE key NOT IN "
+                               "(SELECT key FROM sessions ORDER BY timestamp DESC LIMIT ?)", (self.max_entries,))
+
+    def get(self, key):
+        with self.transaction() as connection:
+            entry = self.touch(connection, key)
+            connection.execute("UPDATE sessions SET timestamp = ? WHERE key = ?", (entry["timestamp"], key))
+
+            return entry
+
+    def update(self, key, fields):
+        with self.transaction() as connection:
+            entry = self.touch(connection, key)
+            entry.update(fields)
+
+            connection.execute("UPDATE sessions SET data = ?, timestamp = ? WHERE key = ?",
+                               (json.dumps(entry), entry["timestamp"], key))
+
+    def touch(self, connection, key):
+        row = connection.execute("SELECT data, timestamp FROM sessions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+
+        now = time.time()
+        if now - row[1] > self.lifetime:
+            connection.execute("DELETE FROM sessions WHERE key = ?", (key,))
+            raise KeyError(key)
+
+        entry = json.loads(row[0])
+        entry["timestamp"] = now
+
+        return entry
+
+
+class SqliteTransaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        # Writers take the lock up front so a read, modify and write of an entry is not interleaved with another one
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Expired entries found while reading are still deleted when the read raises KeyError
+        if exc_type is None or exc_type is KeyError:
+            self.connection.execute("COMMIT")
+        else:
+            self.connection.execute("ROLLBACK")
+
+        return False
+
+
+session_store = None
+session_store_lock = threading.Lock()
+
+
+def get_session_store():
+    global session_store
+
+    with session_store_lock:
+        if session_store is None:
+            session_store = create_session_store()
+
+        return session_store
+
+
+def create_session_store():
+    backend = os.environ.get("ARCHSOLVED_SESSION_BACKEND", session_backend)
+    if backend == "sqlite":
+        file_name = os.environ.get("ARCHSOLVED_SESSION_DATABASE_FILE", session_database_file)
+        return SqliteSessionStore(file_name, session_max_entries, session_lifetime)
+
+    if backend != "memory":
+        raise ValueError("Unknown session backend {0}".format(backend))
+
+    return MemorySessionStore(session_max_entries, session_lifetime)
@@ -0,0 +1,116 @@
+import math
+from collections import defaultdict
+from typing import List
+
+import numpy as np
+
+from solver.const import PULL_DISTANCE
+from solver.corridor import Corridor
+from solver.line import Line
+from solver.point import Point
+
+# Crossings closer than this to an end of either corridor are junctions, which don't split anything
+ENDPOINT_TOLERANCE = 0.1
+
+
+def split_corridors(corridors: List[Corridor]) -> List[Corridor]:
+    if len(corridors) < 2:
+        return list(corridors)
+
+    starts = np.array([[c.line.a.x, c.line.a.y] for c in corridors], dtype=np.float64)
+    ends = np.array([[c.line.b.x, c.line.b.y] for c in corridors], dtype=np.float64)
+
+    first, second = get_candidate_pairs(starts, ends)
+    first, second, t, u, points = calculate_crossings(starts, ends, first, second)
+
+    # Both corridors of a crossing are cut at the very same point so their pieces meet head on
+    cuts = [[] for _ in corridors]
+    for i, j, ti, uj, point in zip(first.tolist(), second.tolist(), t.tolist(), u.tolist(), points.tolist()):
+        cuts[i].append((ti, point))
+        cuts[j].append((uj, point))
+
+    result = []
+    for corridor, corridor_cuts in zip(corridors, cuts):
+        if len(corridor_cuts) == 0:
+            result.append(corridor)
+        else:
+            result.extend(split_corridor(corridor, corridor_cuts))
+
+    return result
+
+
+def split_corridor(corridor, cuts):
+    line = corridor.line
+
+    # Corridors crossing at one point cut this one there more than once, those cuts are merged into one
+    points = [(line.a.x, line.a.y)]
+    for _, point in sorted(cuts):
+        if math.dist(points[-1], point) >= ENDPOINT_TOLERANCE:
+            points.append(tuple(point))
+    points.append((line.b.x, line.b.y))
+
+    # Pieces are measured before they are built, a corridor has to have a length to have a direction
+    pieces = []
+    for (ax, ay), (bx, by) in zip(points, points[1:]):
+        if math.hypot(bx - ax, by - ay) >= PULL_DISTANCE:
+            pieces.append(Corridor(corridor.floor, Line(Point(ax, ay), Point(bx, by))))
+
+    return pieces
+
+
+def get_candidate_pairs(starts, ends):
+    lower = np.minimum(starts, ends)
+    upper = np.maximum(starts, ends)
+
+    # Corridors are bucketed into a uniform grid of cells about as large as an average corridor, only corridors
+    # sharing a cell can cross
+    cell = max(float(np.linalg.norm(ends - starts, axis=1).mean()), 1.0)
+    lower_cells = np.floor(lower / cell).astype(np.int64).tolist()
+    upper_cells = np.floor(upper / cell).astype(np.int64).tolist()
+
+    buckets = defaultdict(list)
+    for i, ((x0, y0), (x1, y1)) in enumerate(zip(lower_cells, upper_cells)):
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                buckets[(x, y)].append(i)
+
+    pairs = set()
+    for bucket in buckets.values():
+        for k, i in enumerate(bucket):
+            for j in bucket[k + 1:]:
+                pairs.add((i, j))
+
+    if len(pairs) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    pairs = np.array(sorted(pairs), dtype=np.intp)
+    first, second = pairs[:, 0], pairs[:, 1]
+
+    overlapping = (lower[first] <= upper[second]).all(axis=1) & (lower[second] <= upper[first]).all(axis=1)
+
+    return first[overlapping], second[overlapping]
+
+
+def calculate_crossings(starts, ends, first, second):
+    r = ends[first] - starts[first]
+    s = ends[second] - starts[second]
+    q = starts[second] - starts[first]
+
+    denominator = cross(r, s)
+    parallel = np.abs(denominator) <= 1e-9 * np.linalg.norm(r, axis=1) * np.linalg.norm(s, axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = cross(q, s) / denominator
+        u = cross(q, r) / denominator
+
+    points = starts[first] + t[:, np.newaxis] * r
+
+    crossing = ~parallel & (t > 0) & (t < 1) & (u > 0) & (u < 1)
+    for ends_of in (starts[first], ends[first], starts[second], ends[second]):
+        crossing &= np.linalg.norm(points - ends_of, axis=1) >= ENDPOINT_TOLERANCE
+
+    return first[crossing], second[crossing], t[crossing], u[crossing], points[crossing]
+
+
+def cross(a, b):
+    return a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
@@ -1 +1,14 @@
 PULL_DISTANCE = 8
+FRONTIER_SHARD_SIZE = 4096
+FRONTIER_SOLUTION_LIMIT = 50000
+FRONTIER_MEMORY_BUDGET = 512 * 1024 * 1024
+
+# Rooms are placed in worker processes in frontiers past this many rows, where sending the frontier to them costs little
+# next to placing the rooms, split into batches for each worker
+FRONTIER_PARALLEL_ROWS = 4 * FRONTIER_SHARD_SIZE
+FRONTIER_BATCHES_PER_WORKER = 4
+
+# The exact search stops after this many nodes, a few seconds of search, and falls back to the heuristic. Every
+# EXACT_PROGRESS_NODES nodes it reports its progress, which is also where it can be cancelled
+EXACT_NODE_LIMIT = 200000
+EXACT_PROGRESS_NODES = 10000
@@ -0,0 +1,259 @@
+import time
+from math import ceil
+from typing import Iterator, List
+
+import numpy as np
+
+import solver.const as const
+from solver.exception import UnsolvableException
+from solver.metrics import StageMetrics
+from solver.solution import Solution
+from solver.solver import DISTRIBUTED_TYPES, RANDOM_TYPES, Solver, get_floor_types
+
+
+class ExactSolver(Solver):
+    def __init__(self, floor_count, climate, corridors, rooms, node_limit=const.EXACT_NODE_LIMIT, **kwargs):
+        super().__init__(floor_count, climate, corridors, rooms, **kwargs)
+
+        # Search stops after node_limit nodes and the heuristic solves instead, its solutions are returned with the
+        # best layout of the search when that scores better. optimal tells if the search finished
+        self.node_limit = node_limit
+        self.node_count = 0
+        self.optimal = False
+
+        self.best_score = -1
+        self.best_assignment = None
+        self.visited = {}
+
+    def solve(self, count=None) -> List[Solution]:
+        start = time.perf_counter()
+        solution = self.create_solution()
+
+        self.ensure_vertical_circulation_exists()
+
+        index = solution.get_side_index()
+        self.facings = index.facings
+        self.floors = index.floors
+        self.ground_sides = index.ground_sides
+        self.floor_sides = index.floor_sides
+
+        # Rooms are placed under the rules Solver places them by, see get_items
+        self.items, room_types = self.get_items(index)
+        self.column_count = sum(1 for item in self.items if item[0] == "column")
+
+        self.lengths = np.array([self.get_room(t).length for t in room_types], dtype=float)
+        self.scores = self.scoring_table.room_scores[self.climate][room_types][:, self.facings]
+        self.levels = sorted(set(self.scores.flatten()) - {0}, reverse=True)
+
+        # suffix_counts[i] is the number of rooms of every type still to be placed before the i-th item is placed
+        self.suffix_counts = np.zeros((len(self.items) + 1, len(room_types)))
+        for i in range(len(self.items) - 1, -1, -1):
+            self.suffix_counts[i] = self.suffix_counts[i + 1]
+            self.suffix_counts[i][self.items[i][1]] += self.items[i][2]
+
+        self.node_count = 0
+        self.best_score = -1
+        self.best_assignment = None
+        self.visited = {}
+
+        self.solution = solution
+        self.room_types = room_types
+        self.stage = 0
+        self.stage_count = ceil(self.node_limit / const.EXACT_PROGRESS_NODES) if self.node_limit is not None else 1
+
+        remaining = np.array([s.remaining for s in solution.sides], dtype=float)
+        self.search(0, remaining, 0, [])
+
+        self.optimal = self.node_limit is None or self.node_count < self.node_limit
+
+        # The search is a single stage, its nodes are the solutions it branched off
+        found = self.best_assignment is not None
+        self.metrics = [StageMetrics(None, time.perf_counter() - start, 1, int(found), self.node_count,
+                                     self.node_count - int(found), 0, 0 if found else len(self.rooms), 0, False)]
+
+        if not self.optimal:
+            return self.solve_heuristic(count)
+
+        if not found:
+            raise UnsolvableException
+
+        self.solution_count = 1
+
+        return [self.get_solution(self.best_assignment)][:count]
+
+    def iter_solve(self, count=None) -> Iterator[Solution]:
+        yield from self.solve(count)
+
+    def solve_heuristic(self, count):
+        search_metrics = self.metrics
+        solutions = list(Solver.iter_solve(self, count))
+        self.metrics = search_metrics + self.metrics
+
+        if self.best_assignment is not None:
+            best = self.get_solution(self.best_assignment)
+            if len(solutions) == 0 or best.get_score() > solutions[0].get_score():
+                solutions.insert(0, best)
+                self.solution_count += 1
+
+        return solutions[:count]
+
+    def get_solution(self, assignment):
+        solution = self.solution.clone()
+
+        for (kind, room_type, room_count, _), i in zip(self.items, assignment):
+            room = self.get_room(self.room_types[room_type])
+            sides = self.floor_sides[i, :room_count] if kind == "column" else [i]
+            for side in sides:
+                solution.insert(side, room)
+
+        solution.intern_sides()
+
+        return solution
+
+    def report_progress(self, depth):
+        # Called every EXACT_PROGRESS_NODES nodes with the type of the room being placed, like a stage of Solver
+        self.stage += 1
+        if self.on_stage is None:
+            return
+
+        found = self.best_assignment is not None
+
+        provisional = []
+        if found and self.provisional_count > 0:
+            provisional = [self.get_solution(self.best_assignment)]
+
+        room_type = self.room_types[self.items[min(depth, len(self.items) - 1)][1]]
+        best_score = self.best_score / sum(item[2] for item in self.items) if found else None
+
+        self.on_stage(self.stage, max(self.stage_count, self.stage), room_type, int(found), best_score, provisional)
+
+    def get_room(self, room_type):
+        return next(r for r in self.rooms if r.type == room_type)
+
+    def get_items(self, index):
+        # Items are (kind, type, room count, sides) placed on one side each. A column stacks rooms of a distributed type
+        # on the same side of the first room count floors, like Solver.distribute, other rooms go to one of the sides.
+        # Columns come first, so that after them every side is only constrained by its floor and facing
+        counts = {}
+        for room in self.rooms:
+            counts[room.type] = counts.get(room.type, 0) + 1
+
+        room_types = [t for t in DISTRIBUTED_TYPES if t in counts]
+        room_types += sorted((t for t in counts if t not in DISTRIBUTED_TYPES),
+                             key=lambda t: (-self.get_room(t).length, t))
+
+        floors = dict(get_floor_types(self.floor_count))
+        all_sides = np.arange(len(index))
+
+        items = []
+        for room_type in room_types:
+            count = counts[room_type]
+            t = room_types.index(room_type)
+
+            if room_type in DISTRIBUTED_TYPES:
+                while count > 0:
+                    room_count = min(self.floor_count, count)
+                    items.append(("column", t, room_count, self.ground_sides))
+                    count -= room_count
+            elif room_type in RANDOM_TYPES:
+                items.extend([("room", t, 1, all_sides)] * count)
+            else:
+                items.extend([("room", t, 1, index.get_floor_sides(floors[room_type]))] * count)
+
+        return items, room_types
+
+    def search(self, depth, remaining, score, assignment):
+        if self.node_limit is not None and self.node_count >= self.node_limit:
+            return
+
+        self.node_count += 1
+        if self.node_count % const.EXACT_PROGRESS_NODES == 0:
+            self.report_progress(depth)
+
+        if depth == len(self.items):
+            if score > self.best_score:
+                self.best_score = score
+                self.best_assignment = list(assignment)
+            return
+
+        if score + self.get_upper_bound(depth, remaining) <= self.best_score:
+            return
+
+        # States that only differ by which of several interchangeable sides got a room are searched once
+        key = (depth, self.get_state_key(depth, remaining))
+        if self.visited.get(key, -1) >= score:
+            return
+        self.visited[key] = score
+
+        kind, room_type, room_count, sides = self.items[depth]
+        length = self.lengths[room_type]
+
+        # Rooms fit where Solver puts them, sides longer than the room and, above the ground floor of a column, as long
+        if kind == "column":
+            stacks = self.floor_sides[:, :room_count]
+            fitting = (remaining[stacks[:, 0]] > length) & (remaining[stacks] >= length).all(axis=1)
+            candidates = np.flatnonzero(fitting)
+            gains = self.scores[room_type][stacks[candidates]].sum(axis=1)
+        else:
+            candidates = sides[remaining[sides] > length]
+            gains = self.scores[room_type][candidates]
+
+        # Best scoring sides first to find a good incumbent early, the fullest of them first to pack rooms tightly
+        fullness = remaining[self.floor_sides[candidates, 0]] if kind == "column" else remaining[candidates]
+        order = np.lexsort((fullness, -gains))
+
+        tried = set()
+        for i, gain in zip(candidates[order], gains[order]):
+            side_key = self.get_side_key(kind, i, remaining)
+            if side_key in tried:
+                continue
+            tried.add(side_key)
+
+            new_remaining = remaining.copy()
+            if kind == "column":
+                new_remaining[self.floor_sides[i, :room_count]] -= length
+            else:
+                new_remaining[i] -= length
+
+            assignment.append(i)
+            self.search(depth + 1, new_remaining, score + gain, assignment)
+            assignment.pop()
+
+    def get_side_key(self, kind, i, remaining):
+        # Corridor sides with the same facing and the same room left on every floor are interchangeable while columns
+        # are placed, after them sides with the same facing, floor and room left are
+        if kind == "column":
+            return self.facings[i], tuple(np.round(remaining[self.floor_sides[i]], 6).tolist())
+
+        return self.facings[i], self.floors[i], round(float(remaining[i]), 6)
+
+    def get_state_key(self, depth, remaining):
+        if depth < self.column_count:
+            return tuple(sorted(zip(
+                self.facings[self.ground_sides].tolist(),
+                map(tuple, np.round(remaining[self.floor_sides], 6).tolist())
+            )))
+
+        return tuple(sorted(zip(self.facings.tolist(), self.floors.tolist(), np.round(remaining, 6).tolist())))
+
+    def get_upper_bound(self, depth, remaining):
+        counts = self.suffix_counts[depth]
+
+        if (counts * self.lengths).sum() > remaining.sum() + 1e-9:
+            return -np.inf
+
+        # How many rooms of each type every side could take if it only got rooms of that type
+        fits = np.floor(remaining[np.newaxis, :] / self.lengths[:, np.newaxis] + 1e-9)
+        if (fits.sum(axis=1) < counts).any():
+            return -np.inf
+
+        # Every type is given the best facings it can reach independently of the others and of the floors it is bound
+        # to, which can only overestimate
+        bound = 0
+        left = counts.copy()
+        for level in self.levels:
+            placed = np.minimum(left, (fits * (self.scores == level)).sum(axis=1))
+            bound += level * placed.sum()
+            left -= placed
+
+        return bound
@@ -1,2 +1,6 @@
 class UnsolvableException(Exception):
     pass
+
+
+class CancelledException(Exception):
+    pass
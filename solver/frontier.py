@@ -0,0 +1,375 @@
+import os
+import tempfile
+from collections import deque
+from math import ceil
+
+import numpy as np
+
+import solver.const as const
+from solver.solution import Solution
+
+
+class Frontier:
+    def __init__(self, solution: Solution, floor_count, room_types, random: np.random.Generator,
+                 memory_budget=const.FRONTIER_MEMORY_BUDGET):
+        self.solution = solution
+        self.floor_count = floor_count
+        self.random = random
+
+        # Solutions past this many bytes are written to memory mapped temporary files and read back shard by shard. The
+        # budget covers the frontier being built and the one it replaces, the shards in flight and per solution scores
+        # and keys come on top of it
+        self.memory_budget = memory_budget
+        self.spilled = False
+
+        self.index = solution.get_side_index()
+        self.facings = self.index.facings
+        self.ground_sides = self.index.ground_sides
+        self.floor_sides = self.index.floor_sides
+
+        self.columns = {}
+        for room_type in room_types:
+            self.columns.setdefault(room_type, len(self.columns))
+
+        self.placed = {}
+
+        # Solutions created by branching and solutions dropped since the frontier was created, for metrics
+        self.clones = 0
+        self.pruned = 0
+
+        # Solutions dropped because a room didn't fit them, which pruned counts too
+        self.unplaced = 0
+
+        # Rooms are placed in shards of large frontiers in the processes of the executor when one is set
+        self.executor = None
+        self.workers = 1
+
+        self.side_scores = np.zeros((len(solution.sides), len(self.columns)))
+        for room_type, column in self.columns.items():
+            self.side_scores[:, column] = solution.scoring.get_room_scores(solution.climate, room_type)[self.facings]
+
+        self.remaining = np.array([[s.remaining for s in solution.sides]], dtype=np.float64)
+        self.counts = np.zeros((1, len(solution.sides), len(self.columns)), dtype=np.uint16)
+
+        # Random odd multipliers hashing the counts of a solution to 128 bits, see get_state_keys
+        self.key_multipliers = np.random.default_rng(0).integers(
+            2 ** 63, size=(self.counts.shape[1] * self.counts.shape[2], 2), dtype=np.uint64
+        ) * np.uint64(2) + np.uint64(1)
+
+    def __len__(self):
+        return len(self.remaining)
+
+    @property
+    def nbytes(self):
+        return self.remaining.nbytes + self.counts.nbytes
+
+    def get_tiers(self, room_type):
+        return self.index.get_tiers(room_type)
+
+    def get_floor_sides(self, floor):
+        return self.index.get_floor_sides(floor)
+
+    def get_column(self, room):
+        self.placed.setdefault(room.type, room)
+
+        return self.columns[room.type]
+
+    def expand(self, room, tiers, room_count):
+        column = self.get_column(room)
+        room_count = min(self.floor_count, room_count)
+
+        # A parent has a child for each ground side at most, so shards of fewer parents keep every expanded shard
+        # within FRONTIER_SHARD_SIZE rows. Expanding is not random, the shard size doesn't change the result. Children
+        # are copies of their parents, which cost more to send back from a worker process than to make, so they are
+        # always made here
+        size = max(const.FRONTIER_SHARD_SIZE // max(len(self.ground_sides), 1), 1)
+
+        self.merge(self.count_pruned(
+            expand_rows(remaining, counts, self.ground_sides, self.floor_sides, tiers, room.length, column, room_count)
+            for remaining, counts in self.split(size)
+        ))
+
+        self.clones += len(self)
+
+    def place(self, room, tiers, sides, room_count):
+        column = self.get_column(room)
+
+        seeds = self.random.integers(2 ** 32, size=len(self.split()))
+
+        self.merge(self.count_pruned(self.map(place_rows, [
+            (sides, tiers, room.length, column, room_count, np.random.default_rng(seed)) for seed in seeds
+        ])))
+
+    def repeat(self, count):
+        if count <= 1:
+            return
+
+        self.clones += len(self) * (count - 1)
+        self.merge(shard for _ in range(count) for shard in self.split())
+
+    def split(self, size=const.FRONTIER_SHARD_SIZE):
+        # Shards have a fixed size so the result does not depend on how many processes place rooms in them
+        return [(self.remaining[i:i + size], self.counts[i:i + size]) for i in range(0, max(len(self), 1), size)]
+
+    def count_pruned(self, shards):
+        for remaining, counts, pruned in shards:
+            self.pruned += pruned
+            self.unplaced += pruned
+            yield remaining, counts
+
+    def map(self, function, arguments):
+        # Calls function with every shard and its arguments. Results are consumed one shard at a time so merge can
+        # spill them before the next one arrives
+        if self.executor is None or len(self) < const.FRONTIER_PARALLEL_ROWS:
+            return (function(remaining, counts, *a) for (remaining, counts), a in zip(self.split(), arguments))
+
+        return self.map_in_processes(function, arguments)
+
+    def map_in_processes(self, function, arguments):
+        # Pickling shards to the workers and back costs more than placing rooms in them, so workers map the frontier
+        # from a file written once and write their results to files the frontier maps back. Shards travel in batches,
+        # a few per worker, and only one more batch than there are workers is in flight so finished ones are merged,
+        # and spilled, before the next ones are sent
+        size = const.FRONTIER_SHARD_SIZE
+
+        with tempfile.TemporaryDirectory() as directory:
+            frontier = (os.path.join(directory, "remaining.npy"), os.path.join(directory, "counts.npy"))
+            np.save(frontier[0], self.remaining)
+            np.save(frontier[1], self.counts)
+
+            shards = [(i, i + size, os.path.join(directory, str(i)), a)
+                      for i, a in zip(range(0, max(len(self), 1), size), arguments)]
+
+            batch_size = ceil(len(shards) / (self.workers * const.FRONTIER_BATCHES_PER_WORKER))
+            batches = iter([shards[i:i + batch_size] for i in range(0, len(shards), batch_size)])
+
+            pending = deque()
+            for batch in batches:
+                pending.append(self.executor.submit(map_shared_rows, function, frontier, batch))
+                if len(pending) == self.workers + 1:
+                    break
+
+            while len(pending) > 0:
+                results = pending.popleft().result()
+
+                batch = next(batches, None)
+                if batch is not None:
+                    pending.append(self.executor.submit(map_shared_rows, function, frontier, batch))
+
+                for files, pruned in results:
+                    yield load_shared(files[0]), load_shared(files[1]), pruned
+
+    def merge(self, shards):
+        remaining_chunks = []
+        counts_chunks = []
+        files = None
+        nbytes = 0
+
+        # The frontier being replaced is freed only after the new one is complete, and joining the chunks of the new
+        # one copies them
+        held = 0 if self.spilled else self.nbytes
+
+        for remaining, counts in shards:
+            if files is None and held + 2 * (nbytes + remaining.nbytes + counts.nbytes) > self.memory_budget:
+                files = (tempfile.TemporaryFile(), tempfile.TemporaryFile())
+                for chunk in remaining_chunks:
+                    chunk.tofile(files[0])
+                for chunk in counts_chunks:
+                    chunk.tofile(files[1])
+
+                remaining_chunks = []
+                counts_chunks = []
+
+            if files is None:
+                remaining_chunks.append(remaining)
+                counts_chunks.append(counts)
+            else:
+                np.ascontiguousarray(remaining).tofile(files[0])
+                np.ascontiguousarray(counts).tofile(files[1])
+
+            nbytes += remaining.nbytes + counts.nbytes
+
+        if files is None:
+            self.remaining = np.concatenate(remaining_chunks)
+            self.counts = np.concatenate(counts_chunks)
+        else:
+            self.remaining = load_spilled(files[0], self.remaining.dtype, self.remaining.shape[1:])
+            self.counts = load_spilled(files[1], self.counts.dtype, self.counts.shape[1:])
+
+        self.spilled = files is not None
+
+    def take(self, rows):
+        size = const.FRONTIER_SHARD_SIZE
+
+        self.merge(
+            (self.remaining[rows[i:i + size]], self.counts[rows[i:i + size]])
+            for i in range(0, max(len(rows), 1), size)
+        )
+
+    def count_missing(self, room_type, room_count):
+        # Rooms of a type the solutions are short of, when each of them should have room_count
+        if room_count == 0:
+            return 0
+
+        column = self.columns[room_type]
+
+        return int(sum(
+            (room_count - counts[:, :, column].sum(axis=1, dtype=np.int64)).sum() for _, counts in self.split()
+        ))
+
+    def get_partial_scores(self):
+        return np.concatenate([(counts * self.side_scores).sum(axis=(1, 2)) for _, counts in self.split()])
+
+    def get_scores(self):
+        room_count = np.concatenate([counts.sum(axis=(1, 2)) for _, counts in self.split()])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.get_partial_scores() / room_count
+
+    def get_best_score(self):
+        scores = self.get_scores()
+        scores = scores[~np.isnan(scores)]
+
+        return float(scores.max()) if len(scores) > 0 else None
+
+    def get_state_keys(self):
+        # A state is the room counts of every side, which is the same for any order the rooms were inserted in. Counts
+        # are hashed to 128 bits instead of compared whole so the keys of a spilled frontier fit in memory
+        keys = np.concatenate([
+            counts.reshape((len(counts), len(self.key_multipliers))).astype(np.uint64) @ self.key_multipliers
+            for _, counts in self.split()
+        ])
+
+        return keys.view(np.dtype((np.void, keys.dtype.itemsize * 2))).ravel()
+
+    def deduplicate(self):
+        _, first = np.unique(self.get_state_keys(), return_index=True)
+        if len(first) == len(self):
+            return
+
+        self.pruned += len(self) - len(first)
+
+        first.sort()
+        self.take(first)
+
+    def keep_best(self, count):
+        if len(self) <= count:
+            return
+
+        self.pruned += len(self) - count
+        self.take(np.sort(np.argsort(-self.get_partial_scores(), kind="stable")[:count]))
+
+    def iter_best_solutions(self, count=None):
+        order = np.argsort(-self.get_scores(), kind="stable")
+        if count is not None:
+            order = order[:count]
+
+        for i in order:
+            yield self.to_solution(i)
+
+    def to_solution(self, i):
+        solution = self.solution.clone()
+
+        for index, counts in enumerate(self.counts[i]):
+            for room_type, room in self.placed.items():
+                for _ in range(counts[self.columns[room_type]]):
+                    solution.insert(index, room)
+
+        solution.intern_sides()
+
+        return solution
+
+
+def map_shared_rows(function, frontier, batch):
+    # Runs in a worker process, the frontier is only read
+    remaining = np.load(frontier[0], mmap_mode="r")
+    counts = np.load(frontier[1], mmap_mode="r")
+
+    results = []
+    for start, stop, path, arguments in batch:
+        new_remaining, new_counts, pruned = function(remaining[start:stop], counts[start:stop], *arguments)
+
+        files = (path + "_remaining.npy", path + "_counts.npy")
+        np.save(files[0], new_remaining)
+        np.save(files[1], new_counts)
+        results.append((files, pruned))
+
+    return results
+
+
+def load_shared(file):
+    # The mapping outlives the file, merge copies the rows out of it
+    array = np.load(file, mmap_mode="r")
+    os.remove(file)
+
+    return array
+
+
+def load_spilled(file, dtype, row_shape):
+    file.flush()
+
+    return np.memmap(file, dtype=dtype, mode="r+").reshape((-1,) + row_shape)
+
+
+def expand_rows(remaining, counts, ground_sides, floor_sides, tiers, length, column, room_count):
+    fitting = remaining[:, ground_sides] > length
+    candidates = select_best_tier(fitting, tiers[ground_sides])
+
+    # Every parent gets a child for each of its fitting sides, which gets a room on that side of the first room_count
+    # floors, parents without one are dropped
+    pruned = int((~candidates.any(axis=1)).sum())
+    parents, sides = np.nonzero(candidates)
+    remaining = remaining[parents]
+    counts = counts[parents]
+
+    if len(parents) == 0:
+        return remaining, counts, pruned
+
+    children = np.arange(len(parents))
+    for floor in range(room_count):
+        targets = floor_sides[sides, floor]
+        inserted = remaining[children, targets] >= length
+
+        remaining[children[inserted], targets[inserted]] -= length
+        counts[children[inserted], targets[inserted], column] += 1
+
+    return remaining, counts, pruned
+
+
+def place_rows(remaining, counts, sides, tiers, length, column, room_count, random):
+    remaining = remaining.copy()
+    counts = counts.copy()
+    pruned = 0
+
+    for _ in range(room_count):
+        fitting = remaining[:, sides] > length
+        candidates = select_best_tier(fitting, tiers[sides])
+
+        # Solutions that can't fit the room are dropped
+        alive = candidates.any(axis=1)
+        if not alive.all():
+            pruned += int((~alive).sum())
+            remaining = remaining[alive]
+            counts = counts[alive]
+            candidates = candidates[alive]
+
+        if len(remaining) == 0:
+            break
+
+        keys = random.random(candidates.shape)
+        keys[~candidates] = -1
+        chosen = sides[keys.argmax(axis=1)]
+
+        rows = np.arange(len(remaining))
+        remaining[rows, chosen] -= length
+        counts[rows, chosen, column] += 1
+
+    return remaining, counts, pruned
+
+
+def select_best_tier(fitting, tiers):
+    best = np.full(len(fitting), -1)
+    for tier in (2, 1, 0):
+        best[(fitting & (tiers == tier)).any(axis=1)] = tier
+
+    return fitting & (tiers[np.newaxis, :] == best[:, np.newaxis])
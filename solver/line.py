@@ -1,16 +1,20 @@
 from solver.point import Point
 
 
-def arround(p):
-    return Point(round(p.x, 1), round(p.y, 1))
-
-
 class Line:
+    __slots__ = ("a", "b", "length", "slope", "offset")
+
     def __init__(self, a, b):
-        self.a = a
-        self.b = b
-        self.length = self.a.distance_from(self.b)
-        self.slope, self.offset = self.calculate_slope_and_offset()
+        slope, offset = calculate_slope_and_offset(a, b)
+
+        object.__setattr__(self, "a", a)
+        object.__setattr__(self, "b", b)
+        object.__setattr__(self, "length", a.distance_from(b))
+        object.__setattr__(self, "slope", slope)
+        object.__setattr__(self, "offset", offset)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Line is immutable")
 
     def calculate_cosine(self):
         if self.a.y < self.b.y:
@@ -30,16 +34,10 @@ class Line:
         return acos(self.calculate_cosine())
 
     def copy(self):
-        return Line(self.a.copy(), self.b.copy())
+        return self
 
     def calculate_slope_and_offset(self):
-        if self.a.x == self.b.x:
-            return None, None
-
-        slope = (self.b.y - self.a.y) / (self.b.x - self.a.x)
-        offset = self.a.y - slope * self.a.x
-
-        return slope, offset
+        return calculate_slope_and_offset(self.a, self.b)
 
     def does_intersect_within_bounds(self, line):
         intersection = self.calculate_intersection_point(line)
@@ -73,20 +71,19 @@ class Line:
         if dist_a < 0.1 or dist_b < 0.1:
             return False
 
-        a = arround(self.a)
-        b = arround(self.b)
-        p = arround(point)
+        a, b, p = self.a, self.b, point
 
+        # Points are compared by their quantised coordinates
         if inclusive:
-            xa = a.x <= p.x <= b.x
-            xb = a.x >= p.x >= b.x
-            ya = a.y <= p.y <= b.y
-            yb = a.y >= p.y >= b.y
+            xa = a.qx <= p.qx <= b.qx
+            xb = a.qx >= p.qx >= b.qx
+            ya = a.qy <= p.qy <= b.qy
+            yb = a.qy >= p.qy >= b.qy
         else:
-            xa = a.x < p.x < b.x
-            xb = a.x > p.x > b.x
-            ya = a.y < p.y < b.y
-            yb = a.y > p.y > b.y
+            xa = a.qx < p.qx < b.qx
+            xb = a.qx > p.qx > b.qx
+            ya = a.qy < p.qy < b.qy
+            yb = a.qy > p.qy > b.qy
 
         return (xa or xb) and (ya or yb)
 
@@ -94,22 +91,27 @@ class Line:
         return self.a.equals(line.a) or self.a.equals(line.b) or self.b.equals(line.a) or self.b.equals(line.b)
 
     def move_a_or_b_by(self, a_or_b, length):
+        # Lines are immutable, the moved line is returned
         if a_or_b == "a":
             dx = (self.b.x - self.a.x) / self.length * length
             dy = (self.b.y - self.a.y) / self.length * length
+
+            return Line(Point(self.a.x + dx, self.a.y + dy), self.b)
         else:
             dx = (self.a.x - self.b.x) / self.length * length
             dy = (self.a.y - self.b.y) / self.length * length
 
-        if a_or_b == "a":
-            self.a.x += dx
-            self.a.y += dy
-        else:
-            self.b.x += dx
-            self.b.y += dy
-
-        self.length = self.a.distance_from(self.b)
-        self.slope, self.offset = self.calculate_slope_and_offset()
+            return Line(self.a, Point(self.b.x + dx, self.b.y + dy))
 
     def __str__(self):
         return "{} > {} ({})".format(self.a, self.b, self.length)
+
+
+def calculate_slope_and_offset(a, b):
+    if a.x == b.x:
+        return None, None
+
+    slope = (b.y - a.y) / (b.x - a.x)
+    offset = a.y - slope * a.x
+
+    return slope, offset
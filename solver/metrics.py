@@ -0,0 +1,37 @@
+class StageMetrics:
+    def __init__(self, room_type, duration, frontier_before, frontier_after, clones, pruned, unplaced, missing_rooms,
+                 nbytes, spilled):
+        # None for the search of ExactSolver, which places every room type in one stage
+        self.room_type = room_type
+        self.duration = duration
+
+        # Frontier sizes when the stage started and finished
+        self.frontier_before = frontier_before
+        self.frontier_after = frontier_after
+
+        # Solutions branched off and solutions dropped during the stage, dropped ones are duplicates, cut by the beam or
+        # couldn't fit a room
+        self.clones = clones
+        self.pruned = pruned
+
+        # Solutions dropped because a room of the stage didn't fit them, and rooms of the stage missing from the
+        # solutions that are left
+        self.unplaced = unplaced
+        self.missing_rooms = missing_rooms
+
+        self.nbytes = nbytes
+        self.spilled = spilled
+
+    def to_dict(self):
+        return {
+            "room_type": self.room_type.name if self.room_type is not None else None,
+            "duration": self.duration,
+            "frontier_before": self.frontier_before,
+            "frontier_after": self.frontier_after,
+            "clones": self.clones,
+            "pruned": self.pruned,
+            "unplaced": self.unplaced,
+            "missing_rooms": self.missing_rooms,
+            "nbytes": self.nbytes,
+            "spilled": self.spilled,
+        }
@@ -1,24 +1,30 @@
-def arround(a):
-    return round(a, 1)
+def quantise(value):
+    # Coordinates are compared to a tenth of a unit, kept as integers so comparing points needs no rounding
+    return int(round(value * 10))
 
 
 class Point:
+    __slots__ = ("x", "y", "qx", "qy")
+
     def __init__(self, x: float, y: float):
-        self.x = x
-        self.y = y
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+        object.__setattr__(self, "qx", quantise(x))
+        object.__setattr__(self, "qy", quantise(y))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Point is immutable")
 
     def distance_from(self, point) -> float:
-        from math import sqrt, pow
+        from math import hypot
 
-        return sqrt(
-            pow(point.x - self.x, 2) + pow(point.y - self.y, 2)
-        )
+        return hypot(point.x - self.x, point.y - self.y)
 
     def equals(self, p):
-        return arround(self.x) == arround(p.x) and arround(self.y) == arround(p.y)
+        return self.qx == p.qx and self.qy == p.qy
 
     def copy(self):
-        return Point(self.x, self.y)
+        return self
 
     def __str__(self):
         return "({}, {})".format(round(self.x, 2), round(self.y, 2))
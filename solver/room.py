@@ -1,15 +1,22 @@
-class Room:
-    def __init__(self, type_string, width, length, room_type=None):
-        if room_type is None:
-            self.type = get_type_from_string(type_string)
-        else:
-            self.type = room_type
-
-        self.width = width
-        self.length = length
-
-    def clone(self):
-        return Room("", self.width, self.length, room_type=self.type)
+from functools import lru_cache
+
+
+class RoomSpec:
+    __slots__ = ("type", "width", "length")
+
+    def __init__(self, room_type, width, length):
+        object.__setattr__(self, "type", room_type)
+        object.__setattr__(self, "width", width)
+        object.__setattr__(self, "length", length)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RoomSpec is immutable")
+
+
+@lru_cache(maxsize=None)
+def get_room_spec(room_type, width, length):
+    # Rooms of one type and size are all the same flyweight, sides hold references to it instead of copies
+    return RoomSpec(room_type, width, length)
 
 
 def get_type_from_string(type_string):
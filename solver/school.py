@@ -1,8 +1,9 @@
 from solver.corridor import Corridor
+from solver.exact import ExactSolver
 from solver.line import Line
 from solver.point import Point
 
-from solver.room import Room
+from solver.room import get_room_spec, get_type_from_string
 from solver.solver import Solver
 
 
@@ -25,13 +26,49 @@ class School:
 
         self.rooms = []
         for name, data in requirements.items():
-            for _ in range(data["count"]):
-                self.rooms.append(Room(name, data["width"], data["length"]))
+            room = get_room_spec(get_type_from_string(name), data["width"], data["length"])
+            self.rooms.extend([room] * data["count"])
 
         self.climate = get_climate_from_string(inputs["climate"])
 
-    def solve(self):
-        return Solver(self.floor_count, self.climate, self.corridors, self.rooms).solve()
+        self.solution_count = 0
+        self.seed = None
+        self.metrics = []
+
+    def solve(self, count=None, beam_width=None, exact=False, workers=1, seed=None, restarts=1, on_stage=None,
+              provisional_count=0):
+        solver = self.get_solver(beam_width, exact, workers, seed, restarts, on_stage, provisional_count)
+        self.seed = solver.seed
+
+        solutions = solver.solve(count)
+
+        self.solution_count = solver.solution_count
+        self.metrics = solver.metrics
+
+        return solutions
+
+    def iter_solve(self, count=None, beam_width=None, exact=False, workers=1, seed=None, restarts=1, on_stage=None,
+                   provisional_count=0):
+        solver = self.get_solver(beam_width, exact, workers, seed, restarts, on_stage, provisional_count)
+        self.seed = solver.seed
+
+        # Counts and metrics are kept when nothing is yielded or the consumer stops early too
+        try:
+            for solution in solver.iter_solve(count):
+                self.solution_count = solver.solution_count
+                self.metrics = solver.metrics
+                yield solution
+        finally:
+            self.solution_count = solver.solution_count
+            self.metrics = solver.metrics
+
+    def get_solver(self, beam_width, exact, workers, seed, restarts, on_stage, provisional_count):
+        # The exact solver falls back to the heuristic one with the same parameters when its search is cut short
+        solver_class = ExactSolver if exact else Solver
+
+        return solver_class(self.floor_count, self.climate, self.corridors, self.rooms, beam_width=beam_width,
+                            workers=workers, seed=seed, restarts=restarts, on_stage=on_stage,
+                            provisional_count=provisional_count)
 
 
 def get_climate_from_string(climate_string):
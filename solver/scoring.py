@@ -0,0 +1,123 @@
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from solver.enums import Climate, ClimateRoomType, Facing, RoomType
+from solver.room import get_climate_room_type
+
+# A table in this file replaces the built in one, see README
+scoring_table_file = "scoring.json"
+
+
+class ScoringTable:
+    def __init__(self, scores):
+        # scores[climate][climate room type][facing]
+        self.scores = np.array(scores, dtype=np.float64).reshape((len(Climate), len(ClimateRoomType), len(Facing)))
+        self.climate_room_types = np.array([get_climate_room_type(t) for t in RoomType], dtype=np.intp)
+
+        # The same scores by room type, and the tier of every score among the facings of its climate and room type, 0
+        # for the best positive score, 1 for the second best and 2 for the rest
+        self.room_scores = self.scores[:, self.climate_room_types, :]
+
+        best = self.room_scores.max(axis=-1, keepdims=True)
+        second = np.where(self.room_scores < best, self.room_scores, 0).max(axis=-1, keepdims=True)
+
+        self.room_tiers = np.full(self.room_scores.shape, 2, dtype=np.intp)
+        self.room_tiers[(self.room_scores == second) & (second > 0)] = 1
+        self.room_tiers[(self.room_scores == best) & (best > 0)] = 0
+
+        for array in (self.scores, self.climate_room_types, self.room_scores, self.room_tiers):
+            array.setflags(write=False)
+
+    def get_climate_scores(self, climate):
+        return self.scores[climate]
+
+    def get_room_scores(self, climate, room_type):
+        return self.room_scores[climate, room_type]
+
+    def get_room_tiers(self, climate, room_type):
+        return self.room_tiers[climate, room_type]
+
+
+def load_scoring_table(filename):
+    # {"COLD": {"CLASSROOM": {"G": 100, "GB": 100, ...}, ...}, ...} with every climate, climate room type and facing
+    with open(filename, "r") as fd:
+        data = json.load(fd)
+
+    scores = [
+        [[data[climate.name][room_type.name][facing.name] for facing in Facing] for room_type in ClimateRoomType]
+        for climate in Climate
+    ]
+
+    return ScoringTable(scores)
+
+
+@lru_cache(maxsize=None)
+def get_scoring_table():
+    if os.path.exists(scoring_table_file):
+        return load_scoring_table(scoring_table_file)
+
+    return ScoringTable(inner_climate_scores())
+
+
+def inner_climate_scores():
+    return [  # G GB B KB K KD D GD
+        [  # COLD
+            [100, 100, 50, 0, 0, 0, 50, 100],  # CLASSROOM
+            [50, 50, 50, 0, 0, 0, 100, 100],  # LIBRARY
+            [0, 0, 50, 100, 100, 100, 50, 0],  # LABORATORY
+            [100, 100, 50, 0, 0, 0, 50, 50],  # CAFE
+            [100, 100, 50, 0, 0, 0, 50, 50],  # MESS
+            [0, 50, 50, 100, 100, 100, 50, 50],  # HALL
+            [0, 50, 50, 100, 100, 100, 50, 50],  # GYM
+            [0, 50, 50, 100, 100, 100, 50, 50],  # AUDITORIUM
+            [100, 100, 50, 50, 0, 0, 50, 100],  # WORKSHOP
+            [0, 0, 0, 50, 100, 50, 0, 0],  # WC
+            [0, 0, 50, 100, 100, 100, 50, 0],  # CIRCULATION
+            [100, 100, 50, 0, 0, 0, 50, 100],  # ADMINISTRATIVE
+        ],
+        [  # MILD
+            [100, 100, 50, 0, 0, 0, 50, 100],  # CLASSROOM
+            [50, 50, 50, 0, 0, 0, 100, 100],  # LIBRARY
+            [0, 50, 50, 100, 100, 100, 50, 50],  # LABORATORY
+            [100, 100, 50, 0, 0, 50, 50, 100],  # CAFE
+            [100, 100, 50, 0, 0, 50, 50, 100],  # MESS
+            [0, 50, 50, 100, 100, 100, 100, 50],  # HALL
+            [0, 50, 50, 100, 100, 100, 100, 50],  # GYM
+            [0, 50, 50, 100, 100, 100, 100, 50],  # AUDITORIUM
+            [100, 100, 50, 50, 0, 0, 50, 100],  # WORKSHOP
+            [0, 0, 50, 100, 100, 100, 50, 0],  # WC
+            [0, 0, 50, 100, 100, 100, 50, 0],  # CIRCULATION
+            [100, 100, 50, 0, 0, 50, 100, 100],  # ADMINISTRATIVE
+        ],
+        [  # HOT DRY
+            [0, 50, 100, 50, 0, 50, 100, 50],  # CLASSROOM
+            [0, 50, 100, 0, 0, 0, 100, 50],  # LIBRARY
+            [100, 50, 0, 50, 100, 50, 0, 50],  # LABORATORY
+            [0, 50, 50, 0, 0, 0, 100, 50],  # CAFE
+            [0, 50, 50, 0, 0, 0, 100, 50],  # MESS
+            [0, 50, 50, 100, 100, 100, 0, 0],  # HALL
+            [0, 50, 50, 100, 100, 100, 0, 0],  # GYM
+            [0, 50, 50, 100, 100, 100, 0, 0],  # AUDITORIUM
+            [0, 50, 50, 50, 0, 0, 100, 100],  # WORKSHOP
+            [0, 0, 0, 50, 100, 50, 0, 0],  # WC
+            [0, 0, 50, 100, 100, 100, 50, 0],  # CIRCULATION
+            [0, 50, 50, 0, 0, 100, 100, 100],  # ADMINISTRATIVE
+        ],
+        [  # HOT HUMID
+            [100, 100, 0, 0, 0, 0, 50, 50],  # CLASSROOM
+            [50, 50, 0, 0, 0, 50, 100, 100],  # LIBRARY
+            [0, 0, 50, 100, 100, 100, 50, 0],  # LABORATORY
+            [100, 50, 0, 0, 0, 0, 50, 100],  # CAFE
+            [100, 50, 0, 0, 0, 0, 50, 100],  # MESS
+            [0, 0, 100, 100, 100, 50, 50, 0],  # HALL
+            [0, 0, 100, 100, 100, 50, 50, 0],  # GYM
+            [0, 0, 100, 100, 100, 50, 50, 0],  # AUDITORIUM
+            [100, 100, 50, 50, 0, 0, 50, 100],  # WORKSHOP
+            [0, 0, 100, 100, 100, 50, 0, 0],  # WC
+            [0, 0, 50, 100, 100, 100, 50, 0],  # CIRCULATION
+            [100, 100, 0, 0, 0, 0, 50, 50],  # ADMINISTRATIVE
+        ]
+    ]
@@ -1,53 +1,30 @@
-class Shape:
-    def __init__(self, layer, points, color):
-        self.layer = layer
-        self.points = points
-        self.color = color
-        self.score = 0
+import numpy as np
 
-    def to_dict(self):
-        return {
-            "layer": self.layer,
-            "points": self.points,
-            "color": self.color,
-            "score": self.score,
-        }
 
+def get_side_frames(origins, angles, mirrored):
+    # Rooms of a side run from its origin along it and are as deep as their width across it, mirroring a side over its
+    # own line only turns the across direction around
+    along = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    sign = np.where(mirrored, -1.0, 1.0)
+    across = np.stack([sign * along[:, 1], -sign * along[:, 0]], axis=1)
 
-def from_room(layer, angle, x, y, length, width, color, offset):
-    return Shape(layer, get_points(angle, x, y, length, width, offset), color)
+    return np.asarray(origins, dtype=np.float64).reshape((-1, 2)), along, across
 
 
-def from_corridor(layer, x1, y1, x2, y2, color):
-    return Shape(layer, [(x1, y1), (x2, y2)], color)
+def get_footprints(frames, sides, offsets, lengths, widths):
+    # Corners of every room as a (rooms x 4 x 2) array, in the order the rooms were drawn in before
+    origins, along, across = frames
 
+    start = origins[sides] + offsets[:, np.newaxis] * along[sides]
+    length = lengths[:, np.newaxis] * along[sides]
+    width = widths[:, np.newaxis] * across[sides]
 
-def get_points(angle, x, y, length, width, offset):
-    from math import sin, cos
+    return np.stack([start, start + width, start + width + length, start + length], axis=1)
 
-    xp, yp = x + offset * cos(angle), y + offset * sin(angle)
 
-    wxc = width * cos(angle)
-    wyc = width * sin(angle)
-    lxc = length * sin(angle)  # width * cos(90 - angle)
-    lyc = length * cos(angle)  # width * sin(90 - angle)
+def get_side_geometry(sides):
+    origins = np.array([[p.x, p.y] for p in (s.get_lower_point() for s in sides)], dtype=np.float64)
+    angles = np.array([s.get_angle() for s in sides], dtype=np.float64)
+    mirrored = np.array([s.a_or_b == "a" for s in sides], dtype=bool)
 
-    return [
-        (xp, yp),
-        rotate([xp, yp], [xp + wxc, yp + wyc]),
-        rotate([xp, yp], [xp + wxc - lxc, yp + wyc + lyc]),
-        rotate([xp, yp], [xp - lxc, yp + lyc]),
-    ]
-
-
-def rotate(origin, point):
-    from math import cos, sin, pi
-
-    ox, oy = origin[0], origin[1]
-    px, py = point[0], point[1]
-    angle = - pi / 2
-
-    qx = ox + cos(angle) * (px - ox) - sin(angle) * (py - oy)
-    qy = oy + sin(angle) * (px - ox) + cos(angle) * (py - oy)
-
-    return qx, qy
+    return origins.reshape((-1, 2)), angles, mirrored
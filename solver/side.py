@@ -4,6 +4,8 @@ from solver.point import Point
 
 
 class Side:
+    __slots__ = ("a_or_b", "facing", "length", "floor", "line", "rooms", "remaining", "name", "__weakref__")
+
     def __init__(self, floor, a_or_b, length, line, corridor_tilt=None, facing=None, rooms=None, remaining=None,
                  name=None):
         self.a_or_b = a_or_b
@@ -33,15 +35,12 @@ class Side:
             self.name = name
 
     def clone_with_floor(self, floor):
-        return Side(floor, self.a_or_b, self.length, self.line.copy(), facing=self.facing)
+        return Side(floor, self.a_or_b, self.length, self.line, facing=self.facing)
 
     def clone(self):
-        new_rooms = []
-        for r in self.rooms:
-            new_rooms.append(r.clone())
-
-        return Side(self.floor, self.a_or_b, self.length, self.line.copy(), facing=self.facing,
-                    remaining=self.remaining, rooms=new_rooms, name=self.name)
+        # Lines and rooms are immutable, so both are shared with the clone
+        return Side(self.floor, self.a_or_b, self.length, self.line, facing=self.facing,
+                    remaining=self.remaining, rooms=list(self.rooms), name=self.name)
 
     def insert(self, room):
         if room.length <= self.remaining:
@@ -74,7 +73,7 @@ class Side:
         return self.line.is_point_within_bounds(point, inclusive)
 
     def move_a_or_b_by(self, a_or_b, length):
-        self.line.move_a_or_b_by(a_or_b, length)
+        self.line = self.line.move_a_or_b_by(a_or_b, length)
 
     def __str__(self):
         return "{} = {}".format(self.name, self.line)
@@ -88,6 +87,9 @@ class Side:
     def get_full_name(self):
         return str(self.floor) + "_" + self.name
 
+    def get_state_key(self):
+        return self.get_full_name(), tuple((r.type, r.length, r.width) for r in self.rooms)
+
 
 def get_facing_from_ab_and_tilt(a_or_b, corridor_tilt):
     from solver.enums import Tilt
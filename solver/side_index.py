@@ -0,0 +1,47 @@
+import numpy as np
+
+
+class SideIndex:
+    def __init__(self, sides, climate, scoring):
+        # Facing, floor and name of a side never change once the solution is created, so the index is built once and
+        # shared by every clone
+        self.climate = climate
+        self.scoring = scoring
+
+        self.facings = np.array([s.facing for s in sides], dtype=np.intp)
+        self.floors = np.array([s.floor for s in sides], dtype=np.intp)
+        self.floor_count = int(self.floors.max()) + 1 if len(sides) > 0 else 0
+
+        self.names = {}
+        for i, side in enumerate(sides):
+            self.names[(side.name, side.floor)] = i
+
+        self.by_floor = [np.flatnonzero(self.floors == floor) for floor in range(self.floor_count)]
+
+        # Sides sharing a name are the same corridor side on different floors, floor_sides[i][j] is the side of the
+        # i-th ground floor side on floor j
+        self.ground_sides = self.get_floor_sides(0)
+        self.floor_sides = np.array(
+            [[self.names[(sides[i].name, floor)] for floor in range(self.floor_count)] for i in self.ground_sides],
+            dtype=np.intp
+        ).reshape((len(self.ground_sides), self.floor_count))
+
+        self.tiers = {}
+
+    def __len__(self):
+        return len(self.facings)
+
+    def get(self, name, floor):
+        return self.names[(name, floor)]
+
+    def get_floor_sides(self, floor):
+        if floor >= self.floor_count:
+            return np.empty(0, dtype=np.intp)
+
+        return self.by_floor[floor]
+
+    def get_tiers(self, room_type):
+        if room_type not in self.tiers:
+            self.tiers[room_type] = self.scoring.get_room_tiers(self.climate, room_type)[self.facings]
+
+        return self.tiers[room_type]
@@ -1,10 +1,11 @@
 import json
-import math
+import weakref
+from functools import lru_cache
 
 import numpy as np
 
-from solver.enums import RoomType
-from solver.room import get_climate_room_type
+from solver.enums import Facing, RoomType
+from solver.scoring import get_scoring_table
 import solver.const as const
 
 
@@ -13,7 +14,7 @@ def arround(p):
 
 
 class Solution:
-    def __init__(self, climate, sides=None, draw_corridors=None):
+    def __init__(self, climate, sides=None, draw_corridors=None, interned_sides=None, scoring=None, side_index=None):
         if draw_corridors is None:
             self.draw_corridors = []
         else:
@@ -25,193 +26,126 @@ class Solution:
         else:
             self.sides = sides
 
-    def get_score(self):
-        from solver.enums import ClimateRoomType, Facing
-
-        counts = np.zeros((len(ClimateRoomType), len(Facing)))
-        total_room_count = 0
+        # Sides are shared between a solution and its clones, only the sides this solution has written to since the
+        # last clone are its own
+        if interned_sides is None:
+            self.interned_sides = weakref.WeakValueDictionary()
+        else:
+            self.interned_sides = interned_sides
 
-        for side in self.sides:
-            for room in side.rooms:
-                counts[get_climate_room_type(room.type)][side.facing] += 1
-                total_room_count += 1
+        self.owned_sides = set()
 
-        counts *= get_climate_scoring(self.climate)
+        if scoring is None:
+            self.scoring = get_scoring_table()
+        else:
+            self.scoring = scoring
 
-        return counts.sum() / total_room_count
+        # Built on first use, after the sides of the solution are final
+        self.side_index = side_index
 
-    def get_class_score(self):
-        from solver.enums import ClimateRoomType, Facing
+        # Scores of every room type and facing in the climate of the solution
+        self.room_scores = self.scoring.room_scores[climate]
 
-        counts = np.zeros((len(ClimateRoomType), len(Facing)))
-        total_room_count = 0
+        # Room counts and score totals are kept up to date by insert
+        self.room_count = 0
+        self.class_count = 0
+        self.score = np.float64(0)
+        self.class_score = np.float64(0)
 
         for side in self.sides:
             for room in side.rooms:
-                if room.type != RoomType.CLASSROOM:
-                    continue
+                self.count_room(side, room)
 
-                counts[get_climate_room_type(room.type)][side.facing] += 1
-                total_room_count += 1
+    def get_score(self):
+        return self.score / self.room_count
 
-        counts *= get_climate_scoring(self.climate)
+    def get_class_score(self):
+        # Solutions without classrooms, like those before classrooms are placed, have no class score
+        if self.class_count == 0:
+            return None
 
-        return counts.sum() / total_room_count
+        return self.class_score / self.class_count
 
-    def get_shapes(self):
-        from solver.enums import RoomType, Facing
-        from solver.shape import from_room, from_corridor
+    def count_room(self, side, room):
+        score = self.room_scores[room.type, side.facing]
 
-        color_map = load_room_color_map_from_file()
+        self.room_count += 1
+        self.score += score
 
-        top_floor = 0
-        for side in self.sides:
-            top_floor = max(side.floor + 1, top_floor)
+        if room.type == RoomType.CLASSROOM:
+            self.class_count += 1
+            self.class_score += score
 
-        rooms = []
-        for side in self.sides:
-            lower_point = side.get_lower_point()
-            other_point = side.get_other_point()
+    def solve_conflicts(self):
+        starts = np.array([[s.line.a.x, s.line.a.y] for s in self.sides], dtype=np.float64).reshape((-1, 2))
+        ends = np.array([[s.line.b.x, s.line.b.y] for s in self.sides], dtype=np.float64).reshape((-1, 2))
+        facings = np.array([s.facing for s in self.sides], dtype=np.intp)
 
-            offset = 0
-            for room in side.rooms:
-                shape = from_room(
-                    side.floor,
-                    side.get_angle(),
-                    float(lower_point.x),
-                    float(lower_point.y),
-                    room.length,
-                    room.width,
-                    color_map[room.type],
-                    offset
-                )
-
-                if side.a_or_b == "a":
-                    new_points = []
-                    for point in shape.points:
-                        new_points.append(mirror(point, (lower_point.x, other_point.x, lower_point.y, other_point.y)))
-
-                    shape.points = new_points
-
-                shape.score = get_climate_room_scores(self.climate, room.type)[side.facing]
-
-                rooms.append(shape)
-
-                offset += room.length
-
-        corridors = []
-        for c in self.draw_corridors:
-            for i in range(top_floor):
-                corridors.append(from_corridor(
-                    i,
-                    c.line.a.x,
-                    c.line.a.y,
-                    c.line.b.x,
-                    c.line.b.y,
-                    color_map[RoomType.CIRCULATION]
-                ))
-
-        rooms.sort(key=lambda r: r.layer)
-        corridors.sort(key=lambda c: c.layer)
-
-        shapes = []
-        shapes.extend(rooms)
-        shapes.extend(corridors)
-
-        return list(map(lambda s: s.to_dict(), shapes))
+        # Sides whose rooms, drawn PULL_DISTANCE away from the corridor towards their facing, run into each other
+        offset_starts, offset_ends = get_offset_lines(starts, ends, facings)
+        foo, bar = get_conflicts(offset_starts, offset_ends)
 
-    def solve_conflicts(self):
-        from solver.point import Point
-        from solver.enums import Facing
-        from solver.line import Line
+        slopes = np.round(get_slopes(starts, ends), 2)
+        keep = slopes[foo] != slopes[bar]
 
-        sides_offsets = {}
-        for side in self.sides:
-            line = side.line
-            offset_slope = - (1 / (side.line.slope if side.line.slope != 0 else 0.00000000000001))
-
-            x = const.PULL_DISTANCE / math.sqrt(offset_slope * offset_slope + 1)
-            y = x * offset_slope
-            new_line1 = Line(Point(line.a.x + x, line.a.y + y), Point(line.b.x + x, line.b.y + y))
-
-            x = -const.PULL_DISTANCE / math.sqrt(offset_slope * offset_slope + 1)
-            y = x * offset_slope
-            new_line2 = Line(Point(line.a.x + x, line.a.y + y), Point(line.b.x + x, line.b.y + y))
-
-            def get_line(side, line1, line2):
-                if side.facing == Facing.KD:
-                    return line1 if line1.a.x > side.line.a.x and line1.a.y < side.line.a.y else line2
-                elif side.facing == Facing.K:
-                    return line1 if                               line1.a.y < side.line.a.y else line2
-                elif side.facing == Facing.KB:
-                    return line1 if line1.a.x < side.line.a.x and line1.a.y < side.line.a.y else line2
-                elif side.facing == Facing.B:
-                    return line1 if line1.a.x < side.line.a.x else line2
-                elif side.facing == Facing.GB:
-                    return line1 if line1.a.x < side.line.a.x and line1.a.y > side.line.a.y else line2
-                elif side.facing == Facing.G:
-                    return line1 if                               line1.a.y > side.line.a.y else line2
-                elif side.facing == Facing.GD:
-                    return line1 if line1.a.x > side.line.a.x and line1.a.y > side.line.a.y else line2
-                elif side.facing == Facing.D:
-                    return line1 if line1.a.x > side.line.a.x else line2
-                else:
-                    return line1
-
-            sides_offsets[side.name] = [side.facing, get_line(side, new_line1, new_line2), []]
-
-        for foo_name, foo in sides_offsets.items():
-            for bar_name, bar in sides_offsets.items():
-                if foo is bar:
-                    continue
-
-                if foo[1].does_intersect_within_bounds(bar[1]):
-                    foo[2].append(bar_name)
-                    bar[2].append(foo_name)
+        # Only sides meeting at an end are trimmed
+        rounded = np.round(np.stack([starts, ends], axis=1), 1)
+        touching = (rounded[foo][:, :, np.newaxis, :] == rounded[bar][:, np.newaxis, :, :]).all(axis=3).any(axis=(1, 2))
+        keep &= touching
 
-        for foo in self.sides:
-            for bar in self.sides:
-                if foo is bar:
-                    continue
-
-                if round(foo.line.slope, 2) == round(bar.line.slope, 2):
-                    continue
-
-                if bar.name not in sides_offsets[foo.name][2]:
-                    continue
-
-                if foo.line.a.equals(bar.line.a) and not (foo.line.is_point_within_bounds(bar.line.b, inclusive=True) or
-                                                          bar.line.is_point_within_bounds(foo.line.b, inclusive=True)):
-                    foo.line.move_a_or_b_by("a", const.PULL_DISTANCE)
-                    bar.line.move_a_or_b_by("a", const.PULL_DISTANCE)
-                elif foo.line.a.equals(bar.line.b) and not (foo.line.is_point_within_bounds(bar.line.a, inclusive=True) or
-                                                            bar.line.is_point_within_bounds(foo.line.b, inclusive=True)):
-                    foo.line.move_a_or_b_by("a", const.PULL_DISTANCE)
-                    bar.line.move_a_or_b_by("b", const.PULL_DISTANCE)
-                elif foo.line.b.equals(bar.line.a) and not (foo.line.is_point_within_bounds(bar.line.b, inclusive=True) or
-                                                            bar.line.is_point_within_bounds(foo.line.a, inclusive=True)):
-                    foo.line.move_a_or_b_by("b", const.PULL_DISTANCE)
-                    bar.line.move_a_or_b_by("a", const.PULL_DISTANCE)
-                elif foo.line.b.equals(bar.line.b) and not (foo.line.is_point_within_bounds(bar.line.a, inclusive=True) or
-                                                            bar.line.is_point_within_bounds(foo.line.a, inclusive=True)):
-                    foo.line.move_a_or_b_by("b", const.PULL_DISTANCE)
-                    bar.line.move_a_or_b_by("b", const.PULL_DISTANCE)
+        # Pairs are trimmed in the order they were compared in before since every trim moves the ends compared after it
+        for i, j in zip(foo[keep].tolist(), bar[keep].tolist()):
+            trim_conflicting_ends(self.sides[i], self.sides[j])
 
         for foo in self.sides:
             foo.length = foo.line.length
             foo.remaining = foo.length
 
+    def insert(self, index, room):
+        if index not in self.owned_sides:
+            self.sides[index] = self.sides[index].clone()
+            self.owned_sides.add(index)
+
+        if not self.sides[index].insert(room):
+            return False
+
+        self.count_room(self.sides[index], room)
+
+        return True
+
+    def intern_sides(self):
+        for index in self.owned_sides:
+            side = self.sides[index]
+            self.sides[index] = self.interned_sides.setdefault(side.get_state_key(), side)
+
+        self.owned_sides.clear()
+
     def clone(self):
-        new_sides = []
-        for s in self.sides:
-            new_sides.append(s.clone())
+        self.intern_sides()
 
-        return Solution(self.climate, new_sides, draw_corridors=self.draw_corridors)
+        solution = Solution(self.climate, draw_corridors=self.draw_corridors, interned_sides=self.interned_sides,
+                            scoring=self.scoring, side_index=self.get_side_index())
+        solution.sides = list(self.sides)
+
+        solution.room_count = self.room_count
+        solution.class_count = self.class_count
+        solution.score = self.score
+        solution.class_score = self.class_score
+
+        return solution
+
+    def get_side_index(self):
+        from solver.side_index import SideIndex
+
+        if self.side_index is None:
+            self.side_index = SideIndex(self.sides, self.climate, self.scoring)
+
+        return self.side_index
 
     def similarity(self, sol):
         shared = 0
         for side in self.sides:
-            sol_side = list(filter(lambda s: s.get_full_name() == side.get_full_name(), sol.sides))[0]
+            sol_side = sol.sides[sol.get_side_index().get(side.name, side.floor)]
 
             for i in range(14):
                 shared += min(side.get_room_count(i), sol_side.get_room_count(i))
@@ -219,98 +153,123 @@ class Solution:
         return shared
 
 
-def mirror(point, line):
-    from math import pow
-
-    px, py = point[0], point[1]
-    x1, x2, y1, y2 = line
-
-    m = (y2 - y1) / (x2 - x1)
-    c = (x2 * y1 - x1 * y2) / (x2 - x1)
-    d = (px + (py - c) * m) / (1 + pow(m, 2))
-
-    return 2 * d - px, 2 * d * m - py + 2 * c
-
-
-def get_climate_scoring(climate):
-    lookup = inner_climate_scores()
-
-    from solver.enums import ClimateRoomType
-    from solver.enums import Facing
-
-    climate_matrix = np.empty((len(ClimateRoomType), len(Facing)))
-    for room in range(len(lookup[climate])):
-        for facing in range(len(lookup[climate][room])):
-            climate_matrix[room][facing] = lookup[climate][room][facing]
-
-    return climate_matrix
-
-
-def get_climate_room_scores(climate, room_type):
-    return inner_climate_scores()[climate][get_climate_room_type(room_type)]
-
-
-def inner_climate_scores():
-    return [  # G GB B KB K KD D GD
-        [  # COLD
-            [100, 100, 50, 0, 0, 0, 50, 100],  # CLASSROOM
-            [50, 50, 50, 0, 0, 0, 100, 100],  # LIBRARY
-            [0, 0, 50, 100, 100, 100, 50, 0],  # LABORATORY
-            [100, 100, 50, 0, 0, 0, 50, 50],  # CAFE
-            [100, 100, 50, 0, 0, 0, 50, 50],  # MESS
-            [0, 50, 50, 100, 100, 100, 50, 50],  # HALL
-            [0, 50, 50, 100, 100, 100, 50, 50],  # GYM
-            [0, 50, 50, 100, 100, 100, 50, 50],  # AUDITORIUM
-            [100, 100, 50, 50, 0, 0, 50, 100],  # WORKSHOP
-            [0, 0, 0, 50, 100, 50, 0, 0],  # WC
-            [0, 0, 50, 100, 100, 100, 50, 0],  # CIRCULATION
-            [100, 100, 50, 0, 0, 0, 50, 100],  # ADMINISTRATIVE
-        ],
-        [  # MILD
-            [100, 100, 50, 0, 0, 0, 50, 100],  # CLASSROOM
-            [50, 50, 50, 0, 0, 0, 100, 100],  # LIBRARY
-            [0, 50, 50, 100, 100, 100, 50, 50],  # LABORATORY
-            [100, 100, 50, 0, 0, 50, 50, 100],  # CAFE
-            [100, 100, 50, 0, 0, 50, 50, 100],  # MESS
-            [0, 50, 50, 100, 100, 100, 100, 50],  # HALL
-            [0, 50, 50, 100, 100, 100, 100, 50],  # GYM
-            [0, 50, 50, 100, 100, 100, 100, 50],  # AUDITORIUM
-            [100, 100, 50, 50, 0, 0, 50, 100],  # WORKSHOP
-            [0, 0, 50, 100, 100, 100, 50, 0],  # WC
-            [0, 0, 50, 100, 100, 100, 50, 0],  # CIRCULATION
-            [100, 100, 50, 0, 0, 50, 100, 100],  # ADMINISTRATIVE
-        ],
-        [  # HOT DRY
-            [0, 50, 100, 50, 0, 50, 100, 50],  # CLASSROOM
-            [0, 50, 100, 0, 0, 0, 100, 50],  # LIBRARY
-            [100, 50, 0, 50, 100, 50, 0, 50],  # LABORATORY
-            [0, 50, 50, 0, 0, 0, 100, 50],  # CAFE
-            [0, 50, 50, 0, 0, 0, 100, 50],  # MESS
-            [0, 50, 50, 100, 100, 100, 0, 0],  # HALL
-            [0, 50, 50, 100, 100, 100, 0, 0],  # GYM
-            [0, 50, 50, 100, 100, 100, 0, 0],  # AUDITORIUM
-            [0, 50, 50, 50, 0, 0, 100, 100],  # WORKSHOP
-            [0, 0, 0, 50, 100, 50, 0, 0],  # WC
-            [0, 0, 50, 100, 100, 100, 50, 0],  # CIRCULATION
-            [0, 50, 50, 0, 0, 100, 100, 100],  # ADMINISTRATIVE
-        ],
-        [  # HOT HUMID
-            [100, 100, 0, 0, 0, 0, 50, 50],  # CLASSROOM
-            [50, 50, 0, 0, 0, 50, 100, 100],  # LIBRARY
-            [0, 0, 50, 100, 100, 100, 50, 0],  # LABORATORY
-            [100, 50, 0, 0, 0, 0, 50, 100],  # CAFE
-            [100, 50, 0, 0, 0, 0, 50, 100],  # MESS
-            [0, 0, 100, 100, 100, 50, 50, 0],  # HALL
-            [0, 0, 100, 100, 100, 50, 50, 0],  # GYM
-            [0, 0, 100, 100, 100, 50, 50, 0],  # AUDITORIUM
-            [100, 100, 50, 50, 0, 0, 50, 100],  # WORKSHOP
-            [0, 0, 100, 100, 100, 50, 0, 0],  # WC
-            [0, 0, 50, 100, 100, 100, 50, 0],  # CIRCULATION
-            [100, 100, 0, 0, 0, 0, 50, 50],  # ADMINISTRATIVE
-        ]
-    ]
+def trim_conflicting_ends(foo, bar):
+    if foo.line.a.equals(bar.line.a) and not (foo.line.is_point_within_bounds(bar.line.b, inclusive=True) or
+                                              bar.line.is_point_within_bounds(foo.line.b, inclusive=True)):
+        foo.move_a_or_b_by("a", const.PULL_DISTANCE)
+        bar.move_a_or_b_by("a", const.PULL_DISTANCE)
+    elif foo.line.a.equals(bar.line.b) and not (foo.line.is_point_within_bounds(bar.line.a, inclusive=True) or
+                                                bar.line.is_point_within_bounds(foo.line.b, inclusive=True)):
+        foo.move_a_or_b_by("a", const.PULL_DISTANCE)
+        bar.move_a_or_b_by("b", const.PULL_DISTANCE)
+    elif foo.line.b.equals(bar.line.a) and not (foo.line.is_point_within_bounds(bar.line.b, inclusive=True) or
+                                                bar.line.is_point_within_bounds(foo.line.a, inclusive=True)):
+        foo.move_a_or_b_by("b", const.PULL_DISTANCE)
+        bar.move_a_or_b_by("a", const.PULL_DISTANCE)
+    elif foo.line.b.equals(bar.line.b) and not (foo.line.is_point_within_bounds(bar.line.a, inclusive=True) or
+                                                bar.line.is_point_within_bounds(foo.line.a, inclusive=True)):
+        foo.move_a_or_b_by("b", const.PULL_DISTANCE)
+        bar.move_a_or_b_by("b", const.PULL_DISTANCE)
+
+
+def get_slopes(starts, ends):
+    dx = ends[:, 0] - starts[:, 0]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(dx == 0, np.inf, (ends[:, 1] - starts[:, 1]) / np.where(dx == 0, 1, dx))
+
+
+def get_offset_lines(starts, ends, facings):
+    slopes = get_slopes(starts, ends)
+    offset_slopes = -(1 / np.where(slopes == 0, 0.00000000000001, slopes))
+
+    x = const.PULL_DISTANCE / np.sqrt(offset_slopes * offset_slopes + 1)
+    y = x * offset_slopes
+    shift = np.stack([x, y], axis=1)
+
+    # The offset towards the facing of a side is the one whose start moved that way, with the same float comparison
+    # of the moved and the original start as a scalar offset would make
+    moved = starts + shift
+    right = moved[:, 0] > starts[:, 0]
+    left = moved[:, 0] < starts[:, 0]
+    up = moved[:, 1] < starts[:, 1]
+    down = moved[:, 1] > starts[:, 1]
+
+    towards_facing = np.select(
+        [facings == Facing.KD, facings == Facing.K, facings == Facing.KB, facings == Facing.B,
+         facings == Facing.GB, facings == Facing.G, facings == Facing.GD, facings == Facing.D],
+        [right & up, up, left & up, left, left & down, down, right & down, right],
+        default=True
+    )
+
+    shift = np.where(towards_facing[:, np.newaxis], shift, -shift)
+
+    return starts + shift, ends + shift
+
+
+def get_conflicts(starts, ends, block_size=1024):
+    # Pairs of segments crossing each other, both ways round and in row-major order. Rows are compared to all segments a
+    # block at a time so only the pairs that cross are kept
+    count = len(starts)
+    pairs = [np.empty((0, 2), dtype=np.intp)]
+
+    for first in range(0, count, block_size):
+        rows = slice(first, first + block_size)
+        x, y, crossing = get_intersections(starts[rows], ends[rows], starts, ends)
+
+        crossing &= is_within_bounds(starts[rows, np.newaxis], ends[rows, np.newaxis], x, y)
+        crossing &= is_within_bounds(starts[np.newaxis], ends[np.newaxis], x, y)
+        crossing[np.arange(x.shape[0]), np.arange(first, first + x.shape[0])] = False
+
+        foo, bar = np.nonzero(crossing)
+        pairs.append(np.stack([foo + first, bar], axis=1))
+        pairs.append(np.stack([bar, foo + first], axis=1))
+
+    pairs = np.unique(np.concatenate(pairs).reshape((-1, 2)), axis=0)
+
+    return pairs[:, 0], pairs[:, 1]
+
+
+def get_intersections(starts_i, ends_i, starts_j, ends_j):
+    # Intersections of the infinite lines through every pair of segments, crossing is False for parallel pairs
+    slopes_i, slopes_j = get_slopes(starts_i, ends_i), get_slopes(starts_j, ends_j)
+    vi, vj = np.isinf(slopes_i)[:, np.newaxis], np.isinf(slopes_j)[np.newaxis, :]
+
+    with np.errstate(invalid="ignore"):
+        oi = np.where(np.isinf(slopes_i), np.nan, starts_i[:, 1] - slopes_i * starts_i[:, 0])[:, np.newaxis]
+        oj = np.where(np.isinf(slopes_j), np.nan, starts_j[:, 1] - slopes_j * starts_j[:, 0])[np.newaxis, :]
+
+    si, sj = slopes_i[:, np.newaxis], slopes_j[np.newaxis, :]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = (oj - oi) / (si - sj)
+        x = np.where(vi, starts_i[:, np.newaxis, 0], x)
+        x = np.where(vj, starts_j[np.newaxis, :, 0], x)
+        y = np.where(vi, sj * x + oj, si * x + oi)
+
+    crossing = ~(vi & vj) & (vi | vj | (np.round(si, 1) != np.round(sj, 1)))
+
+    return x, y, crossing
+
+
+def is_within_bounds(starts, ends, x, y):
+    # Whether the points lie on the segments they are broadcast against, inclusive and away from the segment ends
+    ax, ay = starts[..., 0], starts[..., 1]
+    bx, by = ends[..., 0], ends[..., 1]
+
+    with np.errstate(invalid="ignore"):
+        away = (np.hypot(x - ax, y - ay) >= 0.1) & (np.hypot(x - bx, y - by) >= 0.1)
+
+        ax, ay, bx, by = np.round(ax, 1), np.round(ay, 1), np.round(bx, 1), np.round(by, 1)
+        px, py = np.round(x, 1), np.round(y, 1)
+
+        within_x = ((ax <= px) & (px <= bx)) | ((ax >= px) & (px >= bx))
+        within_y = ((ay <= py) & (py <= by)) | ((ay >= py) & (py >= by))
+
+    return away & within_x & within_y
 
 
+@lru_cache(maxsize=None)
 def load_room_color_map_from_file():
     from solver.room import get_type_from_string
     with open("colors.json", "r") as fd:
@@ -1,62 +1,171 @@
-import random
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from math import ceil
-from typing import List
+from typing import Iterator, List
 
+import numpy as np
+
+import solver.const as const
+from solver.arrangement import split_corridors
 from solver.corridor import Corridor
 from solver.enums import Climate, RoomType
-from solver.exception import UnsolvableException
-from solver.room import Room
-from solver.solution import Solution, get_climate_room_scores
+from solver.frontier import Frontier
+from solver.metrics import StageMetrics
+from solver.room import RoomSpec
+from solver.scoring import ScoringTable, get_scoring_table
+from solver.solution import Solution
+
+# Rooms of these types are stacked on the same side of consecutive floors from the ground floor up
+DISTRIBUTED_TYPES = [RoomType.WC, RoomType.CLASSROOM, RoomType.CIRCULATION]
+
+# Rooms of these types go to any side of any floor
+RANDOM_TYPES = [RoomType.LABORATORY, RoomType.WORKSHOP, RoomType.ADMINISTRATIVE, RoomType.TEACHERS, RoomType.HALL,
+                RoomType.LIBRARY]
+
+
+def get_floor_types(floor_count):
+    # Rooms of these types go to sides of the given floor
+    return [(RoomType.COUNSELING, 1), (RoomType.GYM, 0), (RoomType.CAFE, 0), (RoomType.HEADMASTERS, 1),
+            (RoomType.MESS, floor_count - 1), (RoomType.AUDITORIUM, floor_count - 1)]
 
 
 class Solver:
-    def __init__(self, floor_count: int, climate: Climate, corridors: List[Corridor], rooms: List[Room]):
+    def __init__(self, floor_count: int, climate: Climate, corridors: List[Corridor], rooms: List[RoomSpec],
+                 beam_width: int = None, workers: int = 1, seed: int = None, restarts: int = 1,
+                 memory_budget: int = const.FRONTIER_MEMORY_BUDGET, scoring_table: ScoringTable = None, on_stage=None,
+                 provisional_count: int = 0):
         self.floor_count = floor_count
         self.climate = climate
         self.corridors = corridors
         self.rooms = rooms
 
-    def solve(self) -> List[Solution]:
-        solutions = self.create_solution()
-        solutions = [solutions]
+        # Without a beam width every fitting side is branched on, the frontier is only cut to its best solutions when
+        # it grows past FRONTIER_SOLUTION_LIMIT
+        self.beam_width = beam_width
+
+        self.scoring_table = scoring_table if scoring_table is not None else get_scoring_table()
+
+        # Bytes of partial solutions kept in memory, the rest of the frontier is spilled to disk
+        self.memory_budget = memory_budget
+
+        # Frontier shards are expanded in up to this many processes, see Frontier.map
+        self.workers = workers
+
+        # Randomized stages draw from a generator seeded with this, so a seed reproduces a result exactly. Without one
+        # a fresh seed is picked and kept here to be reported
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+
+        # Randomized stages are run this many times from the same deterministic frontier and the results are merged
+        self.restarts = restarts
+
+        # Called with the stage number, stage count, room type, frontier size, best score so far and the best
+        # provisional_count solutions so far after every stage, raising from it stops the solver
+        self.on_stage = on_stage
+        self.provisional_count = provisional_count
+        self.stage = 0
+        self.stage_count = 0
+
+        # StageMetrics of every finished stage
+        self.metrics = []
+        self.stage_start = None
+
+        self.solution_count = 0
+
+    def solve(self, count=None) -> List[Solution]:
+        return list(self.iter_solve(count))
+
+    def iter_solve(self, count=None) -> Iterator[Solution]:
+        frontier = self.create_frontier()
+        self.solution_count = len(frontier)
+
+        yield from frontier.iter_best_solutions(count)
 
+    def create_frontier(self) -> Frontier:
+        random = np.random.default_rng(self.seed)
+        frontier = Frontier(self.create_solution(), self.floor_count, [r.type for r in self.rooms], random,
+                            self.memory_budget)
+
+        # More processes than processors only add the cost of sending shards to them
+        workers = min(self.workers, os.cpu_count() or 1)
+
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as executor:
+                frontier.executor = executor
+                frontier.workers = workers
+                self.distribute_all(frontier)
+                frontier.executor = None
+                frontier.workers = 1
+        else:
+            self.distribute_all(frontier)
+
+        return frontier
+
+    def distribute_all(self, frontier):
         self.ensure_vertical_circulation_exists()
 
         remaining_rooms = self.rooms.copy()
         room_count = 0
 
-        for rtype in [RoomType.WC, RoomType.CLASSROOM, RoomType.CIRCULATION]:
-            room_count += self.distribute(solutions, remaining_rooms, rtype)
-            print("Solved", rtype, len(solutions))
+        distributed_types = DISTRIBUTED_TYPES
+        floor_types = get_floor_types(self.floor_count)
+        random_types = RANDOM_TYPES
+
+        self.stage = 0
+        self.stage_count = len(distributed_types) + len(floor_types) + len(random_types)
+
+        self.metrics = []
+        self.start_stage(frontier)
+
+        for rtype in distributed_types:
+            stage_room_count = self.distribute(frontier, remaining_rooms, rtype)
+            room_count += stage_room_count
+            self.finish_stage(rtype, frontier, stage_room_count)
 
-        for rtype, floor in [(RoomType.COUNSELING, 1), (RoomType.GYM, 0), (RoomType.CAFE, 0), (RoomType.HEADMASTERS, 1),
-                             (RoomType.MESS, self.floor_count - 1), (RoomType.AUDITORIUM, self.floor_count - 1)]:
-            room_count += self.distribute_to_floor(solutions, remaining_rooms, rtype, floor)
-            room_count += self.distribute_random(solutions, remaining_rooms, rtype)
-            print("Solved", rtype, len(solutions))
+        # Every copy of a solution is placed independently from here on, which is a restart of the randomized stages
+        frontier.repeat(self.restarts)
 
-        for rtype in [RoomType.LABORATORY, RoomType.WORKSHOP, RoomType.ADMINISTRATIVE, RoomType.TEACHERS, RoomType.HALL,
-                      RoomType.LIBRARY]:
-            room_count += self.distribute_random(solutions, remaining_rooms, rtype)
-            print("Solved", rtype, len(solutions))
+        for rtype, floor in floor_types:
+            stage_room_count = self.distribute_to_floor(frontier, remaining_rooms, rtype, floor)
+            stage_room_count += self.distribute_random(frontier, remaining_rooms, rtype)
+            room_count += stage_room_count
+            self.finish_stage(rtype, frontier, stage_room_count)
 
-        if len(remaining_rooms) > 0:
-            print("Undistributed")
-            for r in remaining_rooms:
-                print(r.type)
+        for rtype in random_types:
+            stage_room_count = self.distribute_random(frontier, remaining_rooms, rtype)
+            room_count += stage_room_count
+            self.finish_stage(rtype, frontier, stage_room_count)
 
-        if len(solutions) > 0:
-            for side in solutions[0].sides:
-                print(side.name, "floor: " + str(side.floor + 1), side.facing)
-                for room in side.rooms:
-                    print("    " + str(room.type))
+        # Restarts that ended in the same state are merged
+        frontier.deduplicate()
 
-        return solutions
+    def start_stage(self, frontier):
+        self.stage_start = (time.perf_counter(), len(frontier), frontier.clones, frontier.pruned, frontier.unplaced)
+
+    def finish_stage(self, room_type, frontier, room_count):
+        # Work between two stages, like restarts, is counted in the later one
+        start, frontier_before, clones, pruned, unplaced = self.stage_start
+        self.metrics.append(StageMetrics(
+            room_type, time.perf_counter() - start, frontier_before, len(frontier), frontier.clones - clones,
+            frontier.pruned - pruned, frontier.unplaced - unplaced, frontier.count_missing(room_type, room_count),
+            frontier.nbytes, frontier.spilled
+        ))
+
+        self.stage += 1
+        self.start_stage(frontier)
+
+        if self.on_stage is not None:
+            provisional = []
+            if self.provisional_count > 0:
+                provisional = list(frontier.iter_best_solutions(self.provisional_count))
+
+            self.on_stage(self.stage, self.stage_count, room_type, len(frontier), frontier.get_best_score(),
+                          provisional)
 
     def create_solution(self) -> Solution:
         self.explode()
 
-        solution = Solution(self.climate)
+        solution = Solution(self.climate, scoring=self.scoring_table)
 
         for c in self.corridors:
             solution.draw_corridors.append(c.copy())
@@ -84,55 +193,7 @@ class Solver:
         return solution
 
     def explode(self):
-        while self.explode_pass():
-            pass
-
-    def explode_pass(self):
-        exploded = False
-        new_corridors = list(self.corridors)
-
-        for i, foo in enumerate(self.corridors):
-            for j, bar in enumerate(self.corridors):
-                if foo is bar or \
-                        (foo.line.a.equals(bar.line.a) and foo.line.b.equals(bar.line.b)) or \
-                        (foo.line.a.equals(bar.line.b) and foo.line.b.equals(bar.line.a)):
-                    continue
-
-                if foo.line.is_head_on(bar.line):
-                    continue
-
-                intersection_point = foo.line.calculate_intersection_point(bar.line)
-                if intersection_point is None:  # Case where s and o are parallel
-                    continue
-
-                if intersection_point.equals(foo.line.a) or intersection_point.equals(foo.line.b) or \
-                        intersection_point.equals(bar.line.a) or intersection_point.equals(bar.line.b):
-                    continue
-
-                if foo.line.is_point_within_bounds(intersection_point, inclusive=False):
-                    x, y = foo.explode_at(intersection_point)
-                    if x is not None:
-                        new_corridors.append(x)
-                    if y is not None:
-                        new_corridors.append(y)
-                    new_corridors.remove(foo)
-                    exploded = True
-
-                if bar.line.is_point_within_bounds(intersection_point, inclusive=False):
-                    x, y = bar.explode_at(intersection_point)
-                    if x is not None:
-                        new_corridors.append(x)
-                    if y is not None:
-                        new_corridors.append(y)
-                    self.corridors = new_corridors
-                    new_corridors.remove(bar)
-                    exploded = True
-
-            if exploded:
-                self.corridors = new_corridors
-                return True
-        return exploded
-
+        self.corridors = split_corridors(self.corridors)
 
     def ensure_vertical_circulation_exists(self):
         if not self.has_intersection():
@@ -157,194 +218,69 @@ class Solver:
         # Put circulation to same side of every floor
         pass
 
-    def distribute(self, solutions, remaining_rooms, room_type):
+    def distribute(self, frontier, remaining_rooms, room_type):
         rooms = get_rooms(remaining_rooms, room_type)
         rcc = len(rooms)
 
         if rcc == 0:
             return 0
 
-        room = rooms[0].clone()
+        room = rooms[0]
+        tiers = frontier.get_tiers(room_type)
 
         rooms_per_floor = ceil(len(rooms) / self.floor_count)
         for _ in range(rooms_per_floor):
-            if len(solutions) > 50000:
-                return rcc
-
-            room_count = 0
-            for _a in range(self.floor_count):
-                try:
-                    rooms.pop()
-                    room_count += 1
-                except Exception:
-                    break
-
-            delete_solutions = []
-            new_solutions_cumulative = []
-            for solution in solutions:
-                floors_sides = self.get_sides_sorted(solution, room_type)
-
-                length = room.length
-
-                score = -1
-                for i in range(3):
-                    if len(list(filter(lambda s: s.can_fit_room_by_length(length), floors_sides[0][i]))):
-                        score = i
-                        break
-
-                if score == -1:
-                    delete_solutions.append(solution)
-                    continue
-
-                fitting_sides = list(filter(lambda s: s.can_fit_room_by_length(length), floors_sides[0][score]))
-                new_solutions = [solution.clone() for _ in range(len(fitting_sides))]
+            if self.beam_width is None:
+                frontier.keep_best(const.FRONTIER_SOLUTION_LIMIT)
 
-                for side, new_solution in zip(fitting_sides, new_solutions):
-                    new_floor_sides = self.get_sides_sorted(new_solution, room_type)
-                    name = side.name
-                    for j in range(min(self.floor_count, room_count)):
-                        try:
-                            next(filter(lambda s: s.name == name, new_floor_sides[j][score])).insert(room.clone())
-                        except Exception:
-                            raise UnsolvableException
+            room_count = min(self.floor_count, len(rooms))
+            del rooms[-room_count:]
 
-                new_solutions_cumulative.extend(new_solutions)
-                delete_solutions.append(solution)
+            frontier.expand(room, tiers, room_count)
+            frontier.deduplicate()
 
-            for s in delete_solutions:
-                solutions.remove(s)
-            solutions.extend(new_solutions_cumulative)
+            if self.beam_width is not None:
+                frontier.keep_best(self.beam_width)
 
         return rcc
 
-    def get_sides_sorted(self, solution, room_type):
-        scores = get_climate_room_scores(self.climate, room_type)
-        floors = [[[], [], []] for i in range(self.floor_count)]
-
-        def get_score(s):
-            if scores[s.facing] == 100:
-                return 0
-            elif scores[s.facing] == 50:
-                return 1
-            else:
-                return 2
-
-        for s in solution.sides:
-            floor = s.floor
-            score = get_score(s)
-
-            floors[floor][score].append(s)
-
-        return floors
-
-    def distribute_to_floor(self, solutions, remaining_rooms, room_type, floor):
+    def distribute_to_floor(self, frontier, remaining_rooms, room_type, floor):
         rooms = get_rooms(remaining_rooms, room_type)  # get rooms of type
         rcc = len(rooms)  # get room count of type
 
         if rcc == 0:  # back away if no rooms of type
             return 0
 
-        length = rooms[-1].length  # all rooms of same type have the same length
-
-        while len(rooms) > 0:  # do until all rooms of type are placed
-            room = rooms.pop()  # get a room to place
+        room = rooms[-1]  # all rooms of same type have the same length
+        tiers = frontier.get_tiers(room_type)
+        sides = frontier.get_floor_sides(floor)
 
-            delete_solutions = []  # we might have some solutions that can't fit room, so we delete those
-            for solution in solutions:
-                floors_sides = self.get_sides_sorted_to_floor(solution, room_type, floor)
+        frontier.place(room, tiers, sides, rcc)  # solutions that can't fit a room are dropped from the frontier
 
-                score = -1
-                for i in range(3):
-                    sides_that_can_fit_room = list(filter(lambda s: s.can_fit_room_by_length(length), floors_sides[i]))
-                    if len(sides_that_can_fit_room) != 0:
-                        score = i
-                        chosen_side = random.choice(sides_that_can_fit_room)
-                        chosen_side.insert(room)
-                        break
-
-                if score == -1:
-                    delete_solutions.append(solution)
-
-            for s in delete_solutions:
-                solutions.remove(s)
+        frontier.deduplicate()
 
         return rcc
 
-    def get_sides_sorted_to_floor(self, solution, room_type, floor):
-        scores = get_climate_room_scores(self.climate, room_type)
-        sides = [[], [], []]
-
-        def get_score(s):
-            if scores[s.facing] == 100:
-                return 0
-            elif scores[s.facing] == 50:
-                return 1
-            else:
-                return 2
-
-        for s in filter(lambda s: s.floor == floor, solution.sides):
-            score = get_score(s)
-
-            sides[score].append(s)
-
-        return sides
-
-    def distribute_random(self, solutions, remaining_rooms, room_type):
+    def distribute_random(self, frontier, remaining_rooms, room_type):
         rooms = get_rooms(remaining_rooms, room_type)
         rcc = len(rooms)
 
         if rcc == 0:
             return 0
 
-        length = rooms[-1].length
-
-        while len(rooms) > 0:
-            room = rooms.pop()
+        room = rooms[-1]
+        tiers = frontier.get_tiers(room_type)
+        sides = np.arange(len(frontier.facings))
 
-            delete_solutions = []
-            for solution in solutions:
-                sides = self.get_sides_sorted_random(solution, room_type)
+        frontier.place(room, tiers, sides, rcc)
 
-                score = -1
-                for i in range(3):
-                    sides_that_can_fit_room = list(filter(lambda s: s.can_fit_room_by_length(length), sides[i]))
-                    if len(sides_that_can_fit_room) != 0:
-                        score = i
-                        chosen_side = random.choice(sides_that_can_fit_room)
-                        chosen_side.insert(room)
-                        break
-
-                if score == -1:
-                    delete_solutions.append(solution)
-                    continue
-
-            for s in delete_solutions:
-                solutions.remove(s)
+        frontier.deduplicate()
 
         return rcc
 
-    def get_sides_sorted_random(self, solution, room_type):
-        scores = get_climate_room_scores(self.climate, room_type)
-        sides = [[], [], []]
-
-        def get_score(s):
-            if scores[s.facing] == 100:
-                return 0
-            elif scores[s.facing] == 50:
-                return 1
-            else:
-                return 2
-
-        for s in solution.sides:
-            score = get_score(s)
-            sides[score].append(s)
-
-        return sides
-
 
 def get_rooms(remaining_rooms, room_type):
-    rooms = list(filter(lambda r: r.type == room_type, remaining_rooms))
-    for r in rooms:
-        remaining_rooms.remove(r)
+    rooms = [r for r in remaining_rooms if r.type == room_type]
+    remaining_rooms[:] = [r for r in remaining_rooms if r.type != room_type]
 
     return rooms
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+
+@pytest.fixture(autouse=True)
+def repository_directory(monkeypatch, tmp_path):
+    import cache
+    import session
+    from singleton import Singleton
+
+    # Templates and assets are read relative to the repository, solve results are cached away from it
+    monkeypatch.chdir(root)
+    monkeypatch.setattr(cache, "cache_directory", str(tmp_path / "cache"))
+    monkeypatch.setattr(session, "session_store", None)
+    monkeypatch.delenv("ARCHSOLVED_SESSION_BACKEND", raising=False)
+    monkeypatch.delenv("ARCHSOLVED_SESSION_DATABASE_FILE", raising=False)
+
+    for cls in [cache.SolveCache, cache.SiteCache]:
+        Singleton._instances.pop(cls, None)
+
+    yield
+
+    for cls in [cache.SolveCache, cache.SiteCache]:
+        Singleton._instances.pop(cls, None)
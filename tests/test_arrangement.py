@@ -0,0 +1,55 @@
+import math
+
+from solver.arrangement import split_corridors
+from solver.const import PULL_DISTANCE
+from solver.corridor import Corridor
+from solver.line import Line
+from solver.point import Point
+
+
+def create_corridor(ax, ay, bx, by):
+    return Corridor(0, Line(Point(ax, ay), Point(bx, by)))
+
+
+def get_ends(corridors):
+    return sorted(
+        tuple(sorted([(round(c.line.a.x, 6), round(c.line.a.y, 6)), (round(c.line.b.x, 6), round(c.line.b.y, 6))]))
+        for c in corridors
+    )
+
+
+def test_three_corridors_crossing_at_one_point():
+    corridors = [create_corridor(0, 50, 100, 50), create_corridor(50, 0, 50, 100), create_corridor(0, 0, 100, 100)]
+
+    assert get_ends(split_corridors(corridors)) == [
+        ((0, 0), (50, 50)),
+        ((0, 50), (50, 50)),
+        ((50, 0), (50, 50)),
+        ((50, 50), (50, 100)),
+        ((50, 50), (100, 50)),
+        ((50, 50), (100, 100)),
+    ]
+
+
+def test_corridors_crossing_at_one_point_at_odd_angles():
+    corridors = []
+    for k in range(5):
+        angle = k * math.pi / 5 + 0.1
+        dx, dy = 40 * math.cos(angle), 40 * math.sin(angle)
+        corridors.append(create_corridor(13.7 - dx, 21.3 - dy, 13.7 + dx, 21.3 + dy))
+
+    pieces = split_corridors(corridors)
+
+    assert len(pieces) == 10
+    for piece in pieces:
+        assert math.isclose(piece.length, 40, abs_tol=1e-6)
+
+
+def test_crossing_close_to_an_end_drops_the_short_piece():
+    corridors = [create_corridor(0, 0, 100, 0), create_corridor(PULL_DISTANCE / 2, -50, PULL_DISTANCE / 2, 50)]
+
+    assert get_ends(split_corridors(corridors)) == [
+        ((PULL_DISTANCE / 2, -50), (PULL_DISTANCE / 2, 0)),
+        ((PULL_DISTANCE / 2, 0), (PULL_DISTANCE / 2, 50)),
+        ((PULL_DISTANCE / 2, 0), (100, 0)),
+    ]
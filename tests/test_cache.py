@@ -0,0 +1,53 @@
+import benchmark
+from cache import SolveCache, get_solve_key
+from helper import solve_ranked
+from metrics import Metrics
+
+
+def test_solve_key_only_depends_on_what_the_solver_reads():
+    inputs = benchmark.create_inputs("grid", "small")
+    key = get_solve_key(inputs, count=50, seed=1)
+
+    reordered = benchmark.create_inputs("grid", "small")
+    reordered["requirements"] = dict(reversed(list(reordered["requirements"].items())))
+    reordered["requirements"]["process"] = 7
+    reordered["requirements"]["gym"] = {"width": 1, "length": 1, "count": 0}
+    assert get_solve_key(reordered, count=50, seed=1) == key
+
+    assert get_solve_key(inputs, count=50, seed=2) != key
+    assert get_solve_key(inputs, count=10, seed=1) != key
+
+    changed = benchmark.create_inputs("grid", "small")
+    changed["floor_count"] += 1
+    assert get_solve_key(changed, count=50, seed=1) != key
+
+
+def test_solve_is_cached():
+    hits = Metrics().counters.get("solve_cache_hits", 0)
+
+    results, solution_count, metrics, seed = solve_ranked(benchmark.create_inputs("grid", "small"), 5, seed=1)
+    assert Metrics().counters.get("solve_cache_hits", 0) == hits
+    assert SolveCache().get(get_solve_key(benchmark.create_inputs("grid", "small"), count=5, dimension=400,
+                                          border=10, seed=1)) is not None
+
+    assert solve_ranked(benchmark.create_inputs("grid", "small"), 5, seed=1) == (results, solution_count, metrics, seed)
+    assert Metrics().counters.get("solve_cache_hits", 0) == hits + 1
+
+    solve_ranked(benchmark.create_inputs("grid", "small"), 5, seed=2)
+    assert Metrics().counters.get("solve_cache_hits", 0) == hits + 1
+
+
+def test_cached_seed_reproduces_layout_of_reordered_corridors():
+    inputs = benchmark.create_inputs("grid", "small")
+    solve_ranked(inputs, 5)
+
+    reordered = benchmark.create_inputs("grid", "small")
+    reordered["boundaries"]["corridor"] = reordered["boundaries"]["corridor"][::-1]
+    assert get_solve_key(reordered, count=5) != get_solve_key(inputs, count=5)
+
+    reordered_results, _, _, reordered_seed = solve_ranked(reordered, 5)
+    assert solve_ranked(reordered, 5, seed=reordered_seed)[0] == reordered_results
+
+    reversed_ends = benchmark.create_inputs("grid", "small")
+    reversed_ends["boundaries"]["corridor"] = [line[::-1] for line in reversed_ends["boundaries"]["corridor"]]
+    assert get_solve_key(reversed_ends, count=5) != get_solve_key(inputs, count=5)
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+import solver.const as const
+from solver.enums import RoomType
+from solver.exact import ExactSolver
+from solver.exception import CancelledException
+from solver.school import School
+from solver.solver import DISTRIBUTED_TYPES, get_floor_types
+
+
+def create_inputs():
+    return {
+        "floor_count": 3,
+        "climate": "D",
+        "requirements": {
+            "classroom": {"width": 6, "length": 7, "count": 4},
+            "WC": {"width": 6, "length": 5, "count": 2},
+            "counseling": {"width": 6, "length": 5, "count": 2},
+            "mess": {"width": 6, "length": 9, "count": 1},
+            "library": {"width": 6, "length": 9, "count": 2},
+        },
+        "boundaries": {"corridor": [[[0, 0], [40, 0]], [[60, 10], [80, 40]]]},
+    }
+
+
+def solve_exact(inputs):
+    school = School(inputs)
+    solver = ExactSolver(school.floor_count, school.climate, school.corridors, school.rooms)
+
+    return solver, solver.solve()[0]
+
+
+def test_exact_solver_keeps_floor_and_column_rules():
+    solver, solution = solve_exact(create_inputs())
+    assert solver.optimal
+
+    floors = dict(get_floor_types(3))
+    for side in solution.sides:
+        for room in side.rooms:
+            if room.type in floors:
+                assert side.floor == floors[room.type]
+
+    # Distributed rooms are stacked from the ground floor up on the same corridor side
+    index = solution.get_side_index()
+    for room_type in DISTRIBUTED_TYPES:
+        stacks = np.array([
+            [sum(r.type == room_type for r in solution.sides[side].rooms) for side in floor_sides]
+            for floor_sides in index.floor_sides
+        ])
+        assert (np.diff(stacks, axis=1) <= 0).all()
+
+    rooms = [room for side in solution.sides for room in side.rooms]
+    assert len(rooms) == 11
+    assert sum(room.type == RoomType.COUNSELING for room in rooms) == 2
+
+
+def test_exact_solver_is_not_worse_than_solver():
+    _, solution = solve_exact(create_inputs())
+    best = School(create_inputs()).solve(1)[0]
+
+    assert solution.get_score() >= best.get_score() - 1e-9
+
+
+def get_layouts(solutions):
+    return [[(side.name, side.floor, [r.type for r in side.rooms]) for side in s.sides] for s in solutions]
+
+
+def test_exact_solver_falls_back_to_solver_past_node_limit():
+    school = School(create_inputs())
+    solver = ExactSolver(school.floor_count, school.climate, school.corridors, school.rooms, node_limit=1, seed=5)
+    solutions = solver.solve(3)
+
+    assert not solver.optimal
+    assert get_layouts(solutions) == get_layouts(School(create_inputs()).solve(3, seed=5))
+
+    assert solver.metrics[0].room_type is None
+    assert solver.metrics[0].clones == 1
+    assert len(solver.metrics) > 1
+
+
+def test_exact_solver_reports_progress_and_can_be_cancelled(monkeypatch):
+    monkeypatch.setattr(const, "EXACT_PROGRESS_NODES", 5)
+
+    stages = []
+
+    def on_stage(stage, stage_count, room_type, solution_count, best_score, provisional):
+        stages.append((stage, stage_count, solution_count, len(provisional)))
+        if len(stages) == 3:
+            raise CancelledException
+
+    with pytest.raises(CancelledException):
+        School(create_inputs()).solve(exact=True, on_stage=on_stage, provisional_count=1)
+
+    assert [stage for stage, _, _, _ in stages] == [1, 2, 3]
+    assert all(stage_count == const.EXACT_NODE_LIMIT // 5 for _, stage_count, _, _ in stages)
+    assert all(provisional == solution_count for _, _, solution_count, provisional in stages)
@@ -0,0 +1,54 @@
+import json
+
+import ezdxf
+import pytest
+
+import helper
+from helper import DxfParser, parse_site
+
+
+def assert_same_points(points, expected):
+    assert points.keys() == expected.keys()
+    for layer in expected:
+        assert points[layer] == pytest.approx(expected[layer])
+
+
+def test_streamed_sample_matches_ezdxf():
+    parser = DxfParser("sample.dxf")
+
+    assert_same_points(parser.parse(), parser.parse_document())
+
+
+def test_streamed_drawing_skips_other_layers_and_entities(tmp_path):
+    document = ezdxf.new()
+    for layer in ["siteboundary", "setbackboundary", "corridor", "furniture"]:
+        document.layers.add(layer)
+
+    space = document.modelspace()
+    space.add_lwpolyline([(0, 0), (100, 0), (100, 80), (0, 80)], dxfattribs={"layer": "siteboundary"})
+    space.add_lwpolyline([(5, 5), (95, 5), (95, 75), (5, 75)], dxfattribs={"layer": "setbackboundary"})
+    space.add_line((10, 20), (60, 20), dxfattribs={"layer": "corridor"})
+    space.add_line((60, 20.5), (60, 70), dxfattribs={"layer": "corridor"})
+    space.add_line((0, 0), (50, 50), dxfattribs={"layer": "furniture"})
+    space.add_circle((30, 30), 4, dxfattribs={"layer": "corridor"})
+
+    file_name = str(tmp_path / "site.dxf")
+    document.saveas(file_name)
+
+    parser = DxfParser(file_name)
+    points = parser.parse()
+
+    assert_same_points(points, parser.parse_document())
+    assert len(points["corridor"]) == 2
+
+
+def test_parsed_site_is_cached(monkeypatch):
+    boundaries, area = parse_site("sample.dxf")
+
+    def parse(parser):
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(helper.DxfParser, "parse", parse)
+
+    # Points come back from the cache as lists
+    assert parse_site("sample.dxf") == (json.loads(json.dumps(boundaries)), area)
@@ -0,0 +1,67 @@
+import json
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+import benchmark
+from helper import solve_and_rank
+from jobs import Job, JobManager, max_running_jobs
+
+
+def test_cancel_while_submitting():
+    release = threading.Event()
+    stop = threading.Event()
+    errors = []
+
+    def block(job):
+        release.wait(10)
+
+    def cancel_newest():
+        # Races submit for the job it is registering
+        manager = JobManager()
+        while not stop.is_set():
+            try:
+                with manager.lock:
+                    newest = max(manager.jobs, default=None)
+                manager.cancel(newest)
+            except Exception as e:
+                errors.append(e)
+
+    canceller = threading.Thread(target=cancel_newest)
+    canceller.start()
+
+    try:
+        jobs = [JobManager().submit(0, block) for _ in range(50)]
+    finally:
+        stop.set()
+        canceller.join()
+
+    for job in jobs:
+        JobManager().cancel(job.id)
+
+    release.set()
+    wait([job.future for job in jobs], 10)
+
+    assert errors == []
+    assert all(job.status == "cancelled" for job in jobs[max_running_jobs:])
+
+
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+def test_job_events_are_valid_json(monkeypatch):
+    published = []
+    publish = Job.publish
+
+    def record(job, name, data):
+        published.append((name, json.dumps(data, allow_nan=False)))
+        publish(job, name, data)
+
+    monkeypatch.setattr(Job, "publish", record)
+
+    job = JobManager().submit(0, solve_and_rank, benchmark.create_inputs("grid", "small"))
+    wait([job.future], 60)
+    assert job.status == "done"
+
+    # The first stage places WC rooms, its provisional results have no class score
+    provisional = [json.loads(data) for name, data in published if name == "provisional"]
+    assert provisional[0]["solutions"][0]["class_score"] is None
@@ -0,0 +1,124 @@
+import gzip
+import time
+
+import pytest
+
+import benchmark
+from helper import Database, solve_and_rank, solve_ranked
+from jobs import JobManager
+from main import app
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def wait_for_job(job, timeout=60):
+    deadline = time.time() + timeout
+    while not job.is_finished():
+        assert time.time() < deadline
+        time.sleep(0.05)
+
+
+def test_job_result_page_and_assets(client):
+    process_id = 9001
+    inputs = benchmark.create_inputs("grid", "small")
+
+    Database().new_entry(process_id)
+    Database().put_climate(process_id, inputs["climate"])
+
+    job = JobManager().submit(process_id, solve_and_rank, inputs)
+    wait_for_job(job)
+    assert job.status == "done"
+
+    page = client.get("/jobs/{0}/result".format(job.id))
+    assert page.status_code == 200
+
+    html = page.get_data(as_text=True)
+    assert 'href="/style.css"' in html
+    assert 'src="/muscle.js"' in html
+
+    for path in ["/style.css", "/muscle.js"]:
+        assert client.get(path).status_code == 200
+
+    # Relative paths would have resolved under the job, which has no assets
+    assert client.get("/jobs/{0}/muscle.js".format(job.id)).status_code == 404
+
+
+def test_job_seed_reproduces_result(client):
+    process_id = 9002
+    inputs = benchmark.create_inputs("grid", "small")
+
+    Database().new_entry(process_id)
+    Database().put_climate(process_id, inputs["climate"])
+
+    job = JobManager().submit(process_id, solve_and_rank, inputs)
+    wait_for_job(job)
+    assert job.status == "done"
+
+    seed = client.get("/jobs/{0}".format(job.id)).get_json()["seed"]
+    assert seed is not None
+    assert '<span id="seed">{0}</span>'.format(seed) in client.get("/jobs/{0}/result".format(job.id)).get_data(True)
+
+    results, _, _, reported_seed = solve_ranked(benchmark.create_inputs("grid", "small"), 50, seed=int(seed))
+    assert reported_seed == int(seed)
+    assert results == job.result
+
+    # A cached result comes back with the seed it was solved with
+    assert solve_ranked(benchmark.create_inputs("grid", "small"), 50)[3] == int(seed)
+
+
+def test_assets_are_revalidated_with_etag(client):
+    with open("muscle.js", "rb") as fd:
+        data = fd.read()
+
+    plain = client.get("/muscle.js")
+    assert plain.status_code == 200
+    assert plain.get_data() == data
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["Cache-Control"] == "no-cache"
+
+    compressed = client.get("/muscle.js", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.get_data()) == data
+    assert compressed.headers["ETag"] != plain.headers["ETag"]
+
+    for response, headers in [(plain, {}), (compressed, {"Accept-Encoding": "gzip"})]:
+        revalidated = client.get("/muscle.js", headers=dict(headers, **{"If-None-Match": response.headers["ETag"]}))
+        assert revalidated.status_code == 304
+        assert revalidated.get_data() == b""
+
+    # An ETag of the other encoding doesn't match
+    assert client.get("/muscle.js", headers={"If-None-Match": compressed.headers["ETag"]}).status_code == 200
+
+
+def test_result_page_is_compressed(client):
+    process_id = 9003
+    inputs = benchmark.create_inputs("grid", "small")
+
+    Database().new_entry(process_id)
+    Database().put_climate(process_id, inputs["climate"])
+
+    job = JobManager().submit(process_id, solve_and_rank, inputs)
+    wait_for_job(job)
+
+    path = "/jobs/{0}/result".format(job.id)
+    plain = client.get(path)
+    compressed = client.get(path, headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert len(compressed.get_data()) < len(plain.get_data())
+
+
+def test_result_of_expired_session_is_gone(client):
+    # No session was created for the process, like one evicted while its job ran
+    job = JobManager().submit(9004, solve_and_rank, benchmark.create_inputs("grid", "small"))
+    wait_for_job(job)
+    assert job.status == "done"
+
+    assert client.get("/jobs/{0}/result".format(job.id)).status_code == 410
+    assert client.get("/jobs/{0}".format(job.id)).status_code == 200
@@ -0,0 +1,93 @@
+import json
+import math
+import re
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+import benchmark
+from helper import rank_solutions
+from results import encode_results, result_quantum
+from solver.school import School
+from solver.solution import load_room_color_map_from_file
+
+dimension = 400
+border = 10
+
+
+def decode_results(data):
+    # decode_results of muscle.js, run by node
+    with open("muscle.js") as fd:
+        function = re.search(r"^function decode_results\(data\) \{.*?^\}$", fd.read(), re.M | re.S).group(0)
+
+    script = function + "\nlet data = JSON.parse(require('fs').readFileSync(0, 'utf8'));" \
+                        "\nprocess.stdout.write(JSON.stringify(decode_results(data)));"
+
+    output = subprocess.run(["node", "-e", script], input=json.dumps(data), capture_output=True, text=True, check=True)
+
+    return json.loads(output.stdout)
+
+
+def get_room_corners(side, offset, room):
+    # Corners of a room the way they were drawn room by room, turned a quarter to the right of the side and mirrored
+    # over the side for a sides
+    lower, other = side.get_lower_point(), side.get_other_point()
+    angle = side.get_angle()
+
+    x, y = lower.x + offset * math.cos(angle), lower.y + offset * math.sin(angle)
+    corners = [
+        (x, y),
+        (x + room.width * math.sin(angle), y - room.width * math.cos(angle)),
+        (x + room.width * math.sin(angle) + room.length * math.cos(angle),
+         y - room.width * math.cos(angle) + room.length * math.sin(angle)),
+        (x + room.length * math.cos(angle), y + room.length * math.sin(angle)),
+    ]
+
+    if side.a_or_b == "a":
+        origin = np.array([lower.x, lower.y])
+        direction = np.array([other.x - lower.x, other.y - lower.y]) / math.dist((lower.x, lower.y), (other.x, other.y))
+        corners = [2 * (origin + np.dot(p - origin, direction) * direction) - p for p in np.array(corners)]
+
+    return np.array(corners)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="decoding runs muscle.js in node")
+def test_decoded_results_match_solutions():
+    school = School(benchmark.create_inputs("diagonal", "small"))
+    ranked = rank_solutions(school.solve(5, seed=3), 5)
+
+    data = json.loads(json.dumps(encode_results(ranked, dimension, border)))
+    decoded = decode_results(data)
+
+    color_map = load_room_color_map_from_file()
+    assert len(decoded) == len(ranked) > 0
+
+    for (i, solution), result, encoded in zip(ranked, decoded, data["solutions"]):
+        assert result["i"] == i
+        assert result["score"] == pytest.approx(float(solution.get_score()))
+
+        scale, x_delta, y_delta = encoded["transform"]
+
+        rooms = [(side, offset, room) for side in sorted(solution.sides, key=lambda s: s.floor)
+                 for offset, room in zip(np.cumsum([0] + [r.length for r in side.rooms]), side.rooms)]
+        shapes = [shape for shape in result["shapes"] if len(shape["points"]) == 4]
+        corridors = [shape for shape in result["shapes"] if len(shape["points"]) == 2]
+
+        assert len(shapes) == len(rooms)
+        assert len(corridors) == len(solution.draw_corridors) * data["floor_count"]
+
+        for (side, offset, room), shape in zip(rooms, shapes):
+            points = (np.array(shape["points"]) - [x_delta, y_delta]) / scale
+
+            assert points == pytest.approx(get_room_corners(side, offset, room), abs=2 * result_quantum)
+            assert shape["layer"] == side.floor
+            assert shape["color"] == color_map[room.type]
+            assert shape["score"] == solution.room_scores[room.type, side.facing]
+
+        # Every solution is scaled to fill the drawing up to the border
+        points = np.array([point for shape in result["shapes"] for point in shape["points"]])
+        assert points.min() >= border - 1e-6
+        assert points.max() <= dimension - border + 1e-6
+        assert (points.max(axis=0) - points.min(axis=0)).max() == pytest.approx(dimension - 2 * border)
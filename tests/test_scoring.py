@@ -0,0 +1,28 @@
+import json
+
+from solver.enums import Climate, ClimateRoomType, Facing, RoomType
+from solver.scoring import inner_climate_scores, load_scoring_table
+
+
+def test_tiers_are_ranked_within_every_climate_and_room_type(tmp_path):
+    scores = inner_climate_scores()
+    scores[Climate.COLD][ClimateRoomType.CLASSROOM] = [30, 20, 20, 10, 0, 0, 0, 30]
+    scores[Climate.COLD][ClimateRoomType.WC] = [0, 0, 0, 0, 0, 0, 0, 0]
+
+    data = {
+        climate.name: {
+            room_type.name: {facing.name: scores[climate][room_type][facing] for facing in Facing}
+            for room_type in ClimateRoomType
+        }
+        for climate in Climate
+    }
+
+    file_name = tmp_path / "scoring.json"
+    file_name.write_text(json.dumps(data))
+
+    table = load_scoring_table(str(file_name))
+
+    # The best scores of the table are 100 and 50, which no classroom facing scores any more
+    assert table.get_room_tiers(Climate.COLD, RoomType.CLASSROOM).tolist() == [0, 1, 1, 2, 2, 2, 2, 0]
+    assert table.get_room_tiers(Climate.COLD, RoomType.WC).tolist() == [2] * len(Facing)
+    assert table.get_room_tiers(Climate.MILD, RoomType.CLASSROOM).tolist() == [0, 0, 1, 2, 2, 2, 1, 0]
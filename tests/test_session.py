@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+
+import session
+from session import MemorySessionStore, SqliteSessionStore, get_session_store
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        # Every call is a little later, so entries used one after the other are ordered
+        self.now += 0.001
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session.time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def create_store(request, tmp_path):
+    def create(max_entries=1000, lifetime=60):
+        if request.param == "sqlite":
+            return SqliteSessionStore(str(tmp_path / "sessions.sqlite3"), max_entries, lifetime)
+
+        return MemorySessionStore(max_entries, lifetime)
+
+    return create
+
+
+def test_least_recently_used_session_is_evicted(clock, create_store):
+    store = create_store(max_entries=2)
+
+    store.create(1)
+    store.create(2)
+    store.get(1)
+    store.create(3)
+
+    store.get(1)
+    store.get(3)
+    with pytest.raises(KeyError):
+        store.get(2)
+
+
+def test_expired_session_is_dropped(clock, create_store):
+    store = create_store(lifetime=60)
+
+    store.create(1)
+    store.update(1, {"climate": "COLD"})
+
+    clock.now += 30
+    assert store.get(1)["climate"] == "COLD"
+
+    clock.now += 61
+    with pytest.raises(KeyError):
+        store.get(1)
+
+
+def test_sqlite_stores_share_sessions_and_ids(tmp_path):
+    file_name = str(tmp_path / "sessions.sqlite3")
+    first = SqliteSessionStore(file_name, 1000, 60)
+    second = SqliteSessionStore(file_name, 1000, 60)
+
+    first.create(1)
+    second.update(1, {"floor_count": 3})
+    assert first.get(1)["floor_count"] == 3
+
+    ids = [first.next_id("job"), second.next_id("job"), first.next_id("job"), second.next_id()]
+    assert ids == [1, 2, 3, 1]
+
+
+def test_backend_is_read_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("ARCHSOLVED_SESSION_BACKEND", "sqlite")
+    monkeypatch.setenv("ARCHSOLVED_SESSION_DATABASE_FILE", str(tmp_path / "sessions.sqlite3"))
+
+    store = get_session_store()
+
+    assert isinstance(store, SqliteSessionStore)
+    assert store.file_name == str(tmp_path / "sessions.sqlite3")
+
+
+def test_store_is_created_once():
+    barrier = threading.Barrier(8)
+    stores = []
+
+    def create():
+        barrier.wait()
+        stores.append(get_session_store())
+
+    threads = [threading.Thread(target=create) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(stores) == 8
+    assert all(store is stores[0] for store in stores)
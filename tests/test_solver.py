@@ -0,0 +1,149 @@
+import numpy as np
+
+import benchmark
+import solver.const as const
+import solver.solver as solver_module
+from solver.enums import RoomType
+from solver.frontier import Frontier
+from solver.school import School
+from solver.solver import Solver
+
+
+def test_no_corridors_solve_to_no_solutions():
+    inputs = {
+        "floor_count": 2,
+        "climate": "C",
+        "requirements": {"WC": {"width": 3, "length": 4, "count": 2}},
+        "boundaries": {"corridor": []},
+    }
+
+    assert School(inputs).solve() == []
+
+
+def create_unsolvable_inputs():
+    # No side of the corridor is long enough for the gym
+    return {
+        "floor_count": 2,
+        "climate": "C",
+        "requirements": {
+            "classroom": {"width": 6, "length": 7, "count": 2},
+            "gym": {"width": 12, "length": 60, "count": 1},
+        },
+        "boundaries": {"corridor": [[[0, 0], [40, 0]]]},
+    }
+
+
+def test_unsolvable_iter_solve_keeps_metrics():
+    school = School(create_unsolvable_inputs())
+    assert list(school.iter_solve()) == []
+
+    solved = School(create_unsolvable_inputs())
+    assert solved.solve() == []
+
+    assert len(school.metrics) == len(solved.metrics) == 15
+    assert school.solution_count == 0
+
+
+def test_stage_metrics_count_solutions_a_room_did_not_fit():
+    school = School(create_unsolvable_inputs())
+    list(school.iter_solve())
+
+    stages = {stage.room_type: stage for stage in school.metrics}
+    gym = stages[RoomType.GYM]
+    assert gym.unplaced == gym.frontier_before > 0
+    assert gym.frontier_after == 0
+
+    classroom = stages[RoomType.CLASSROOM]
+    assert classroom.unplaced == 0
+    assert classroom.missing_rooms == 0
+
+
+def solve_layouts(inputs, **kwargs):
+    school = School(inputs)
+    solver = Solver(school.floor_count, school.climate, school.corridors, school.rooms, seed=3, **kwargs)
+
+    solutions = solver.solve(5)
+    layouts = [(s.get_score(), [(side.name, side.floor, [r.type for r in side.rooms]) for side in s.sides])
+               for s in solutions]
+
+    return layouts, solver
+
+
+def test_spilled_frontier_solves_like_in_memory():
+    inputs = benchmark.create_inputs("grid", "small")
+
+    in_memory, solver = solve_layouts(inputs)
+    assert not any(stage.spilled for stage in solver.metrics)
+
+    spilled, solver = solve_layouts(inputs, memory_budget=1)
+    assert all(stage.spilled for stage in solver.metrics)
+
+    assert len(in_memory) > 0
+    assert spilled == in_memory
+
+
+def test_worker_processes_solve_like_one_process(monkeypatch):
+    inputs = benchmark.create_inputs("grid", "small")
+    one_process, _ = solve_layouts(inputs)
+
+    mapped = []
+    map_in_processes = Frontier.map_in_processes
+
+    def record(frontier, function, arguments):
+        mapped.append(function.__name__)
+        yield from map_in_processes(frontier, function, arguments)
+
+    monkeypatch.setattr(const, "FRONTIER_PARALLEL_ROWS", 1)
+    monkeypatch.setattr(solver_module.os, "cpu_count", lambda: 2)
+    monkeypatch.setattr(Frontier, "map_in_processes", record)
+
+    workers, _ = solve_layouts(inputs, workers=2)
+
+    assert "place_rows" in mapped
+    assert len(one_process) > 0
+    assert workers == one_process
+
+
+def test_empty_frontier_has_no_state_keys():
+    school = School(create_unsolvable_inputs())
+    solver = Solver(school.floor_count, school.climate, school.corridors, school.rooms)
+
+    # Every solution was dropped at the gym, and the stages after it deduplicate the empty frontier
+    frontier = solver.create_frontier()
+
+    assert len(frontier) == 0
+    assert len(frontier.get_state_keys()) == 0
+    assert list(frontier.iter_best_solutions()) == []
+
+
+def test_beam_width_bounds_frontier():
+    school = School(benchmark.create_inputs("grid", "small"))
+    solutions = school.solve(beam_width=4, seed=3)
+
+    assert 0 < len(solutions) <= 4
+    assert all(stage.frontier_after <= 4 for stage in school.metrics)
+
+
+def test_deduplicate_merges_equal_states_only():
+    school = School(benchmark.create_inputs("grid", "small"))
+    frontier = Solver(school.floor_count, school.climate, school.corridors, school.rooms, seed=3).create_frontier()
+    counts = frontier.counts.copy()
+
+    frontier.repeat(3)
+    frontier.deduplicate()
+    assert (frontier.counts == counts).all()
+
+    # Moving a room to the next side gives states close to the others, none of which may be taken for another
+    sides, columns = np.nonzero(counts[0])
+    rows = np.flatnonzero(counts[:, sides[0], columns[0]] > 0)
+    moved = counts[rows]
+    moved[:, sides[0], columns[0]] -= 1
+    moved[:, (sides[0] + 1) % counts.shape[1], columns[0]] += 1
+
+    frontier.remaining = np.concatenate([frontier.remaining, frontier.remaining[rows]])
+    frontier.counts = np.concatenate([counts, moved])
+    frontier.deduplicate()
+
+    expected = np.unique(np.concatenate([counts, moved]).reshape((len(counts) + len(moved), -1)), axis=0)
+    assert len(moved) > 0
+    assert len(frontier) == len(expected)